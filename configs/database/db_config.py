@@ -1,11 +1,13 @@
 # configs/database/db_config.py
 import os
 import logging
+import functools
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+@functools.lru_cache(maxsize=1)
 def get_db_config():
     config = {
         "host": os.getenv("DB_HOST", "localhost"),
@@ -2,12 +2,22 @@
 import os
 import subprocess
 import logging
+import argparse
+import threading
+import configparser
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Parallel S3 requests per aws CLI invocation (CLI default is 10)
+MAX_CONCURRENT_REQUESTS = 50
 
 class OpenAlexDownloader:
     def __init__(self, base_dir):
         self.base_dir = base_dir
         self.raw_dir = os.path.join(base_dir, 'data', 'raw')
+        # CLI environment, built on first download; see _cli_env
+        self._env = None
+        self._env_lock = threading.Lock()
         self.setup_logging()
 
     def setup_logging(self):
@@ -20,40 +30,126 @@ class OpenAlexDownloader:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
-    def download_entity(self, entity_type):
-        """Download a specific entity type from OpenAlex S3."""
+    def _cli_env(self):
+        """
+        Environment for aws CLI calls with raised S3 transfer concurrency.
+
+        The CLI only reads s3.max_concurrent_requests from a config file, so
+        a config under data/ holding just the active profile's s3 settings
+        (and region) from the user's config (AWS_CONFIG_FILE or
+        ~/.aws/config), with the setting added, is selected via
+        AWS_CONFIG_FILE. Downloads use --no-sign-request, so no credential
+        or SSO settings are copied, and an explicit max_concurrent_requests
+        in the user's config wins.
+        """
+        with self._env_lock:
+            if self._env is not None:
+                return self._env
+
+            user_config = configparser.RawConfigParser()
+            user_config.read(os.path.expanduser(os.environ.get('AWS_CONFIG_FILE', '~/.aws/config')))
+
+            # Same precedence as the CLI
+            profile = os.environ.get('AWS_PROFILE') or os.environ.get('AWS_DEFAULT_PROFILE') or 'default'
+            section = profile if profile == 'default' else f'profile {profile}'
+
+            # s3 is a nested section: "key = value" lines inside one value
+            s3 = dict(
+                (part.strip() for part in line.split('=', 1))
+                for line in user_config.get(section, 's3', fallback='').splitlines()
+                if '=' in line
+            )
+            s3.setdefault('max_concurrent_requests', str(MAX_CONCURRENT_REQUESTS))
+
+            config = configparser.RawConfigParser()
+            config.add_section(section)
+            region = user_config.get(section, 'region', fallback=None)
+            if region:
+                config.set(section, 'region', region)
+            config.set(section, 's3', ''.join(f"\n{key} = {value}" for key, value in s3.items()))
+
+            config_file = os.path.join(self.base_dir, 'data', 'aws_s3.config')
+            os.makedirs(os.path.dirname(config_file), exist_ok=True)
+            fd = os.open(config_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # The mode above only applies to new files
+            os.chmod(config_file, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                config.write(f)
+
+            self._env = dict(os.environ, AWS_CONFIG_FILE=config_file)
+            return self._env
+
+    def download_entity(self, entity_type, resume=False):
+        """
+        Download a specific entity type from OpenAlex S3.
+
+        A plain recursive copy is used by default; it skips the per-object
+        HEAD/compare pass that sync performs. Use resume=True to fall back to
+        sync and only fetch files missing from a previous partial download.
+        """
         target_dir = os.path.join(self.raw_dir, entity_type)
         os.makedirs(target_dir, exist_ok=True)
 
-        s3_path = f"s3://openalex/data/{entity_type}/updated_date=2024-01-*"
+        s3_path = f"s3://openalex/data/{entity_type}/"
         
         logging.info(f"Starting download of {entity_type}")
         try:
             cmd = [
-                "aws", "s3", "sync",
+                "aws", "s3", "sync" if resume else "cp",
                 "--no-sign-request",
+                "--only-show-errors",
                 s3_path,
-                target_dir
+                target_dir,
+                "--exclude", "*",
+                "--include", "updated_date=2024-01-*"
             ]
-            subprocess.run(cmd, check=True)
+            if not resume:
+                cmd.insert(3, "--recursive")
+            # Progress output is suppressed; stderr is kept for failures only
+            subprocess.run(
+                cmd, check=True, env=self._cli_env(),
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
             logging.info(f"Successfully downloaded {entity_type}")
             return True
         except subprocess.CalledProcessError as e:
             logging.error(f"Error downloading {entity_type}: {str(e)}")
+            if e.stderr:
+                logging.error(e.stderr.decode(errors='replace').strip())
             return False
 
-    def download_all_entities(self):
-        """Download all entity types."""
+    def download_all_entities(self, resume=False):
+        """
+        Download all entity types, several at a time.
+
+        Entities are independent, so up to ENTITY_PARALLELISM (default 5)
+        CLI transfers run concurrently.
+        """
         entities = ['works', 'authors', 'concepts', 'institutions', 'venues']
+        max_workers = max(1, min(len(entities), int(os.getenv("ENTITY_PARALLELISM", 5))))
         
-        for entity in entities:
-            success = self.download_entity(entity)
-            if not success:
-                logging.error(f"Failed to download {entity}")
-                return False
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.download_entity, entity, resume=resume): entity
+                for entity in entities
+            }
+            for future in as_completed(futures):
+                if not future.result():
+                    logging.error(f"Failed to download {futures[future]}")
+                    for pending in futures:
+                        pending.cancel()
+                    return False
         return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk download OpenAlex entity files')
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Use aws s3 sync to skip files already downloaded'
+    )
+    args = parser.parse_args()
+
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
     downloader = OpenAlexDownloader(base_dir)
-    downloader.download_all_entities()
\ No newline at end of file
+    downloader.download_all_entities(resume=args.resume)
@@ -1,12 +1,23 @@
 # scripts/etl/download/streaming_downloader.py
 import os
-import subprocess
 import logging
 from datetime import datetime
 import argparse
 import json
-from ..utils.streaming_base import StreamingBase
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore import UNSIGNED
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from ..utils.streaming_base import StreamingBase, enable_queue_logging, rotating_file_handler
 from ..utils.state_manager import StateManager
+from ..utils.concurrency import AdaptiveConcurrencyController
+
+S3_BUCKET = "openalex"
 
 class StreamingDownloader(StreamingBase):
     def __init__(self, base_dir, entity_types=None):
@@ -15,6 +26,15 @@ class StreamingDownloader(StreamingBase):
 
         :param base_dir: Base directory for ETL process
         :param entity_types: List of entity types to download (optional)
+
+        Parallel file downloads start at 4 and are tuned from observed
+        throughput up to S3_DOWNLOAD_CONCURRENCY (default 16), and the
+        total number of in-flight GET requests across all of them is capped
+        by S3_MAX_INFLIGHT (default 64). Up to PROCESS_QUEUE_SIZE (default 4)
+        downloaded files are buffered ahead of the processor callback.
+        S3 listings are cached on disk for LISTING_CACHE_TTL seconds
+        (default 3600). With STREAM_DOWNLOADS set, files are streamed into
+        the processor callback instead of being written to the temp dir.
         """
         super().__init__(base_dir, "downloader")
         self.state_manager = StateManager(base_dir)
@@ -23,6 +43,33 @@ class StreamingDownloader(StreamingBase):
             'domains', 'fields', 'subfields', 'topics', 
             'publishers'
         ]
+        self.concurrency = int(os.getenv("S3_DOWNLOAD_CONCURRENCY", 16))
+        self._listing_cache = {}
+        self.listing_cache_ttl = int(os.getenv("LISTING_CACHE_TTL", 3600))
+        self.queue_size = int(os.getenv("PROCESS_QUEUE_SIZE", 4))
+        self.stream_downloads = os.getenv("STREAM_DOWNLOADS", "").lower() in ("1", "true", "yes")
+        self.max_inflight = max(int(os.getenv("S3_MAX_INFLIGHT", 64)), self.concurrency)
+        self.concurrency_controller = AdaptiveConcurrencyController(
+            initial=4, maximum=self.concurrency
+        )
+
+        # One anonymous client shared by all download threads (boto3 clients
+        # are thread-safe); large files are fetched as parallel ranged GETs.
+        # The per-file range concurrency is derived from the in-flight budget
+        # so that concurrent files never oversubscribe the connection pool.
+        self.s3 = boto3.client(
+            "s3",
+            config=Config(signature_version=UNSIGNED, max_pool_connections=self.max_inflight)
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=max(1, self.max_inflight // self.concurrency),
+            # Larger socket reads / file writes cut per-GB syscalls and
+            # Python-level copy overhead (boto3 default is 256 KiB)
+            io_chunksize=1024 * 1024,
+            use_threads=True
+        )
         
         # Logging setup
         log_dir = os.path.join(base_dir, 'logs', 'download')
@@ -33,43 +80,119 @@ class StreamingDownloader(StreamingBase):
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(log_file),
+                rotating_file_handler(log_file),
                 logging.StreamHandler()
             ]
         )
+        # Download threads log through a queue; a listener thread does the I/O
+        enable_queue_logging()
 
-    def get_latest_date_folder(self, entity_type):
+    def list_latest_files(self, entity_type):
         """
-        Get the latest updated_date folder for an entity type.
+        List the .gz files of the latest updated_date folder for an entity type.
+
+        A single paginated listing of the entity prefix is scanned and only the
+        newest updated_date= folder is kept. The result is cached in memory
+        and on disk (see _load_listing_cache), so repeated calls and resumed
+        runs do not re-list S3. The latest folder is therefore resolved once
+        per entity per downloader: to pick up a newer updated_date= folder
+        mid-run, create a new StreamingDownloader (and let the on-disk entry
+        expire or complete the entity, which removes it).
 
-        :param entity_type: Type of entity to download
-        :return: Latest date folder or None
+        :param entity_type: Type of entity to list files for
+        :return: List of file info dictionaries (processed files included)
         """
+        if entity_type in self._listing_cache:
+            return self._listing_cache[entity_type]
+
+        files = self._load_listing_cache(entity_type)
+        if files is not None:
+            self._listing_cache[entity_type] = files
+            return files
+
+        prefix = f"data/{entity_type}/"
+        paginator = self.s3.get_paginator("list_objects_v2")
+        latest_folder = None
+        names = []
+        for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                if not key.endswith('.gz'):
+                    continue
+                folder, _, file_name = key[len(prefix):].partition('/')
+                if not folder.startswith('updated_date='):
+                    continue
+                folder += '/'
+                if latest_folder is None or folder > latest_folder:
+                    latest_folder = folder
+                    names = []
+                if folder == latest_folder:
+                    names.append(file_name)
+
+        if latest_folder is None:
+            logging.warning("No updated_date folders found for %s", entity_type)
+            return []
+
+        logging.info("Latest folder for %s: %s", entity_type, latest_folder)
+        files = [
+            {
+                'folder': latest_folder,
+                'name': file_name,
+                'full_path': f"{latest_folder}{file_name}"
+            }
+            for file_name in names
+        ]
+        self._listing_cache[entity_type] = files
+        self._store_listing_cache(entity_type, files)
+        return files
+
+    def _listing_cache_path(self, entity_type):
+        """Path of the on-disk listing cache for an entity type."""
+        return os.path.join(self.temp_dir, f'listing_{entity_type}.json')
+
+    def _load_listing_cache(self, entity_type):
+        """
+        Load a cached listing if it is younger than LISTING_CACHE_TTL.
+
+        :param entity_type: Type of entity
+        :return: Cached list of file info dictionaries or None
+        """
+        cache_file = self._listing_cache_path(entity_type)
         try:
-            cmd = [
-                "aws", "s3", "ls", "--no-sign-request",
-                f"s3://openalex/data/{entity_type}/"
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Filter and sort updated_date folders
-            date_folders = [
-                line.split()[-1] for line in result.stdout.splitlines()
-                if line.strip().endswith('/') and 'updated_date=' in line
-            ]
-            
-            if not date_folders:
-                logging.warning(f"No updated_date folders found for {entity_type}")
-                return None
-                
-            latest_folder = sorted(date_folders)[-1]
-            logging.info(f"Latest folder for {entity_type}: {latest_folder}")
-            return latest_folder
-            
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Error getting latest date folder for {entity_type}: {str(e)}")
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, IOError) as e:
+            logging.warning("Ignoring unreadable listing cache %s: %s", cache_file, e)
             return None
 
+        age = time.time() - cached.get('timestamp', 0)
+        if age >= self.listing_cache_ttl:
+            return None
+
+        logging.info("Using cached listing for %s (%ds old)", entity_type, age)
+        return cached.get('files', [])
+
+    def _store_listing_cache(self, entity_type, files):
+        """
+        Persist a listing with the current timestamp.
+
+        :param entity_type: Type of entity
+        :param files: List of file info dictionaries
+        """
+        cache_file = self._listing_cache_path(entity_type)
+        try:
+            with open(cache_file, 'w') as f:
+                json.dump({'timestamp': time.time(), 'files': files}, f)
+        except IOError as e:
+            logging.warning("Could not write listing cache %s: %s", cache_file, e)
+
+    def _invalidate_listing_cache(self, entity_type):
+        """Drop the in-memory and on-disk listing for an entity type."""
+        self._listing_cache.pop(entity_type, None)
+        self.cleanup_temp_file(self._listing_cache_path(entity_type))
+
     def list_s3_files(self, entity_type):
         """
         List files for an entity type in the latest updated_date folder.
@@ -77,35 +200,19 @@ class StreamingDownloader(StreamingBase):
         :param entity_type: Type of entity to list files for
         :return: List of files to download
         """
-        latest_folder = self.get_latest_date_folder(entity_type)
-        if not latest_folder:
-            return []
-
         try:
-            cmd = [
-                "aws", "s3", "ls", "--no-sign-request",
-                f"s3://openalex/data/{entity_type}/{latest_folder}"
+            # Skip files that were already processed
+            processed = self.state_manager.processed_set(entity_type)
+            files = [
+                file_info for file_info in self.list_latest_files(entity_type)
+                if file_info['full_path'] not in processed
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
             
-            files = []
-            for line in result.stdout.splitlines():
-                if line.strip().endswith('.gz'):
-                    file_name = line.split()[-1]
-                    file_info = {
-                        'folder': latest_folder,
-                        'name': file_name,
-                        'full_path': f"{latest_folder}{file_name}"
-                    }
-                    # Skip if already processed
-                    if not self.state_manager.is_file_processed(entity_type, file_info['full_path']):
-                        files.append(file_info)
-            
-            logging.info(f"Found {len(files)} new files to download for {entity_type}")
+            logging.info("Found %d new files to download for %s", len(files), entity_type)
             return files
             
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Error listing files for {entity_type}: {str(e)}")
+        except (BotoCoreError, ClientError) as e:
+            logging.error("Error listing files for %s: %s", entity_type, e)
             return []
 
     def download_file(self, entity_type, file_info, max_retries=3):
@@ -118,77 +225,209 @@ class StreamingDownloader(StreamingBase):
         :return: Path to downloaded file or None
         """
         temp_file = os.path.join(self.temp_dir, file_info['name'])
-        s3_path = f"s3://openalex/data/{entity_type}/{file_info['folder']}{file_info['name']}"
+        key = f"data/{entity_type}/{file_info['folder']}{file_info['name']}"
+        s3_path = f"s3://{S3_BUCKET}/{key}"
         
         for attempt in range(max_retries):
             try:
-                cmd = ["aws", "s3", "cp", "--no-sign-request", s3_path, temp_file]
-                logging.info(f"Downloading (attempt {attempt+1}): {s3_path}")
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug("Downloading (attempt %d): %s", attempt + 1, s3_path)
                 
-                subprocess.run(cmd, check=True)
-                logging.info(f"Successfully downloaded to {temp_file}")
+                self.s3.download_file(
+                    Bucket=S3_BUCKET,
+                    Key=key,
+                    Filename=temp_file,
+                    Config=self.transfer_config,
+                    Callback=self.concurrency_controller.record_bytes
+                )
                 return temp_file
                 
-            except subprocess.CalledProcessError as e:
-                logging.warning(f"Download error attempt {attempt+1}: {str(e)}")
+            except (BotoCoreError, ClientError) as e:
+                logging.warning("Download error attempt %d: %s", attempt + 1, e)
+                self.concurrency_controller.record_retry()
                 if attempt < max_retries - 1:
-                    import time
                     time.sleep(2 ** attempt)  # Exponential backoff
                 else:
-                    logging.error(f"Failed to download {s3_path} after {max_retries} attempts")
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
+                    logging.error("Failed to download %s after %d attempts", s3_path, max_retries)
+                    try:
+                        os.unlink(temp_file)
+                    except FileNotFoundError:
+                        pass
                     return None
 
+    def _download_tracked(self, entity_type, file_info):
+        """
+        Record the file as in progress and download it once the adaptive
+        controller grants a slot (runs on a worker thread).
+
+        :param entity_type: Type of entity being downloaded
+        :param file_info: Dictionary with file information
+        :return: Path to downloaded file or None
+        """
+        self.concurrency_controller.acquire()
+        try:
+            self.state_manager.save_state(entity_type, file_info['full_path'])
+            return self.download_file(entity_type, file_info)
+        finally:
+            self.concurrency_controller.release()
+
+    def _process_streamed(self, entity_type, files, processor_callback):
+        """
+        Stream each file from S3 straight into the processor callback.
+
+        The callback receives the open S3 response body instead of a path and
+        must read it as a gzip stream; nothing is written to the temp dir.
+        Files are handled one at a time on this thread.
+
+        :param entity_type: Type of entity being processed
+        :param files: List of file info dictionaries
+        :param processor_callback: Callback taking a binary file object and
+            the file's full path
+        :return: True if successful, False otherwise
+        """
+        for i, file_info in enumerate(files, 1):
+            logging.info("Streaming file %d/%d: %s", i, len(files), file_info['name'])
+            self.state_manager.save_state(entity_type, file_info['full_path'])
+
+            key = f"data/{entity_type}/{file_info['folder']}{file_info['name']}"
+            try:
+                body = self.s3.get_object(Bucket=S3_BUCKET, Key=key)['Body']
+            except (BotoCoreError, ClientError) as e:
+                logging.error("Failed to open %s: %s", file_info['name'], e)
+                return False
+
+            try:
+                if processor_callback:
+                    if processor_callback(body, file_info['full_path']):
+                        self.state_manager.mark_file_complete(entity_type, file_info['full_path'])
+                    else:
+                        logging.error("Processing failed for %s", file_info['name'])
+                        return False
+            except Exception as e:
+                logging.error("Error processing %s: %s", file_info['name'], e)
+                return False
+            finally:
+                body.close()
+
+        return True
+
+    def _process_downloaded(self, entity_type, files, processor_callback):
+        """
+        Download files to the temp dir in parallel and process them in turn.
+
+        :param entity_type: Type of entity being processed
+        :param files: List of file info dictionaries
+        :param processor_callback: Callback taking a local file path and the
+            file's full path
+        :return: True if successful, False otherwise
+        """
+        # Downloader threads feed a bounded queue that this thread drains, so
+        # downloads overlap with processing while at most PROCESS_QUEUE_SIZE
+        # finished files wait on disk. Processing stays on this thread so the
+        # callback (and its database connection) is never used concurrently.
+        ready = queue.Queue(maxsize=self.queue_size)
+        abort = threading.Event()
+
+        def produce(file_info):
+            if abort.is_set():
+                return
+            try:
+                temp_file = self._download_tracked(entity_type, file_info)
+            except Exception as e:
+                logging.error("Error downloading %s: %s", file_info['name'], e)
+                temp_file = None
+            ready.put((file_info, temp_file))
+
+        def run_producers():
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for file_info in files:
+                    executor.submit(produce, file_info)
+            ready.put(None)  # End of downloads
+
+        producer = threading.Thread(target=run_producers, daemon=True)
+        producer.start()
+
+        success = True
+        processed = 0
+        while True:
+            item = ready.get()
+            if item is None:
+                break
+            file_info, temp_file = item
+            if not success:
+                # Aborting: discard downloads that finished meanwhile
+                if temp_file:
+                    self.cleanup_temp_file(temp_file)
+                continue
+
+            processed += 1
+            logging.info("Processing file %d/%d: %s", processed, len(files), file_info['name'])
+
+            if not temp_file:
+                logging.error("Failed to download %s", file_info['name'])
+                success = False
+            else:
+                try:
+                    # Process file if callback is provided
+                    if processor_callback:
+                        if processor_callback(temp_file, file_info['full_path']):
+                            self.state_manager.mark_file_complete(entity_type, file_info['full_path'])
+                        else:
+                            logging.error("Processing failed for %s", file_info['name'])
+                            success = False
+
+                    # Clean up temporary file
+                    self.cleanup_temp_file(temp_file)
+                except Exception as e:
+                    logging.error("Error processing %s: %s", file_info['name'], e)
+                    self.cleanup_temp_file(temp_file)
+                    success = False
+
+            if not success:
+                # Skip downloads that have not started yet
+                abort.set()
+
+        producer.join()
+
+        return success
+
     def process_entity(self, entity_type, processor_callback=None):
         """
         Download and process files for a specific entity type.
 
         :param entity_type: Type of entity to process
-        :param processor_callback: Optional callback for processing downloaded files
+        :param processor_callback: Optional callback for processing downloaded
+            files; receives a local path, or the S3 body when STREAM_DOWNLOADS is
+            set, and the file's full path (updated_date folder and name)
         :return: True if successful, False otherwise
         """
         # Check if entity is already completed
         if self.state_manager.is_entity_completed(entity_type):
-            logging.info(f"Entity {entity_type} already completed. Skipping.")
+            logging.info("Entity %s already completed. Skipping.", entity_type)
             return True
 
         # List files to download
         files = self.list_s3_files(entity_type)
         if not files:
-            logging.error(f"No files found for {entity_type}")
+            logging.error("No files found for %s", entity_type)
             return False
 
-        # Process each file
-        for i, file_info in enumerate(files, 1):
-            logging.info(f"Processing file {i}/{len(files)}: {file_info['name']}")
-            
-            # Save current state
-            self.state_manager.save_state(entity_type, file_info['full_path'])
-            
-            # Download file
-            temp_file = self.download_file(entity_type, file_info)
-            if temp_file:
-                try:
-                    # Process file if callback is provided
-                    if processor_callback:
-                        if processor_callback(temp_file):
-                            self.state_manager.mark_file_complete(entity_type, file_info['full_path'])
-                        else:
-                            logging.error(f"Processing failed for {file_info['name']}")
-                            return False
-                    
-                    # Clean up temporary file
-                    self.cleanup_temp_file(temp_file)
-                except Exception as e:
-                    logging.error(f"Error processing {file_info['name']}: {str(e)}")
-                    return False
+        # Resume points of files from an older updated_date folder can never
+        # be used again
+        self.state_manager.prune_checkpoints(entity_type, files[0]['folder'])
+
+        # Per-file progress is buffered and written out periodically
+        with self.state_manager.batch(entity_type):
+            if self.stream_downloads:
+                success = self._process_streamed(entity_type, files, processor_callback)
             else:
-                logging.error(f"Failed to download {file_info['name']}")
-                return False
+                success = self._process_downloaded(entity_type, files, processor_callback)
+        if not success:
+            return False
 
         # Mark entity as completed
         self.state_manager.mark_entity_complete(entity_type)
+        self._invalidate_listing_cache(entity_type)
         return True
 
 def main():
@@ -236,7 +475,7 @@ def main():
     for entity_type in entity_types:
         success = downloader.process_entity(entity_type)
         if not success:
-            logging.error(f"Failed to download {entity_type}")
+            logging.error("Failed to download %s", entity_type)
 
 if __name__ == "__main__":
     main()
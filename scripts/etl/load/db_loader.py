@@ -1,16 +1,30 @@
 # scripts/etl/load/db_loader.py
 import os
 import logging
-import psycopg2
+import threading
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Optional
 
+# Entity types in load order. Works rows refer to the entities of the first
+# stage, which do not depend on each other.
+LOAD_STAGES = (('concepts', 'authors', 'institutions', 'venues'), ('works',))
+
 class OpenAlexLoader:
-    def __init__(self, base_dir, db_config):
+    def __init__(self, base_dir, db_config, max_workers=8):
         self.base_dir = base_dir
         self.processed_dir = os.path.join(base_dir, 'data', 'processed')
         self.db_config = db_config
+        self.max_workers = max_workers
         self.setup_logging()
+        # Shared across load calls so each COPY reuses an open session; it
+        # is opened on the first get_connection, so creating a loader does
+        # not touch the database. ThreadedConnectionPool raises when
+        # exhausted, so callers wait on the semaphore for a free connection.
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pool_slots = threading.BoundedSemaphore(max_workers)
 
     def setup_logging(self):
         log_dir = os.path.join(self.base_dir, 'logs', 'etl')
@@ -23,35 +37,107 @@ class OpenAlexLoader:
         )
 
     def get_connection(self):
-        """Get database connection."""
-        return psycopg2.connect(**self.db_config)
+        """Get a pooled database connection; return it with release_connection."""
+        self._pool_slots.acquire()
+        try:
+            with self._pool_lock:
+                if self._pool is None or self._pool.closed:
+                    self._pool = ThreadedConnectionPool(minconn=1, maxconn=self.max_workers, **self.db_config)
+            return self._pool.getconn()
+        except Exception:
+            self._pool_slots.release()
+            raise
+
+    def release_connection(self, conn):
+        """Return a connection obtained from get_connection to the pool."""
+        try:
+            self._pool.putconn(conn)
+        finally:
+            self._pool_slots.release()
+
+    def close(self):
+        """Close all pooled database connections."""
+        with self._pool_lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _copy_file(self, conn, table_name: str, input_path: str, copy_options: str):
+        """
+        COPY one CSV file into a table using the given connection.
+
+        :param conn: Open database connection (transaction is left to the caller)
+        :param table_name: Fully qualified target table
+        :param input_path: Path of the CSV file
+        :param copy_options: Options for the COPY WITH clause
+        """
+        with conn.cursor() as cur:
+            # Bulk load: a crash may lose the last commit, never corrupt it
+            cur.execute("SET LOCAL synchronous_commit = off")
+            # The file is passed through as bytes without decoding
+            with open(input_path, 'rb') as f:
+                cur.copy_expert(
+                    f"COPY {table_name} FROM STDIN WITH ({copy_options})",
+                    f
+                )
+        logging.info(f"Loaded {os.path.basename(input_path)} into {table_name}")
 
-    def load_entity(self, entity_type: str, batch_size: int = 10000):
-        """Load CSV files for a specific entity type into the database."""
+    def _copy_file_pooled(self, table_name: str, input_path: str, copy_options: str):
+        """
+        COPY one CSV file on a pooled connection and commit it.
+
+        :param table_name: Fully qualified target table
+        :param input_path: Path of the CSV file
+        :param copy_options: Options for the COPY WITH clause
+        """
+        conn = self.get_connection()
+        try:
+            with conn:
+                self._copy_file(conn, table_name, input_path, copy_options)
+        finally:
+            self.release_connection(conn)
+
+    def load_entity(self, entity_type: str, batch_size: int = 10000, workers: Optional[int] = None):
+        """
+        Load CSV files for a specific entity type into the database.
+
+        Files are loaded in parallel, each COPY on its own pooled connection
+        and committed independently.
+
+        :param entity_type: Type of entity to load
+        :param batch_size: Unused, kept for compatibility
+        :param workers: Files loaded at once (default: max_workers, the
+            whole connection pool)
+        :return: True if successful, False otherwise
+        """
         input_dir = os.path.join(self.processed_dir, entity_type)
+        table_name = f"openalex.{entity_type}"
         
         logging.info(f"Starting load of {entity_type}")
 
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cur:
-                    # Process each CSV file in the input directory
-                    for filename in os.listdir(input_dir):
-                        if not filename.endswith('.csv'):
-                            continue
-
-                        input_path = os.path.join(input_dir, filename)
-                        table_name = f"openalex.{entity_type}"
-
-                        # Use COPY command for efficient bulk loading
-                        with open(input_path, 'r') as f:
-                            cur.copy_expert(
-                                f"COPY {table_name} FROM STDIN WITH CSV HEADER",
-                                f
-                            )
-                        
-                        conn.commit()
-                        logging.info(f"Loaded {filename} into {table_name}")
+            with os.scandir(input_dir) as it:
+                input_paths = sorted(
+                    entry.path for entry in it
+                    if entry.is_file(follow_symlinks=False) and entry.name.endswith('.csv')
+                )
+
+            with ThreadPoolExecutor(max_workers=workers or self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self._copy_file_pooled, table_name, input_path,
+                        "FORMAT csv, HEADER true"
+                    )
+                    for input_path in input_paths
+                ]
+                for future in as_completed(futures):
+                    future.result()
 
             return True
 
@@ -60,14 +146,31 @@ class OpenAlexLoader:
             return False
 
     def load_all_entities(self):
-        """Load all entity types."""
-        entities = ['concepts', 'works', 'authors', 'institutions', 'venues']
-        
-        for entity in entities:
-            success = self.load_entity(entity)
-            if not success:
-                logging.error(f"Failed to load {entity}")
-                return False
+        """
+        Load all entity types in dependency order, several at a time.
+
+        The entities works rows refer to (concepts, authors, institutions,
+        venues) do not depend on each other, so up to ENTITY_PARALLELISM
+        (default 5) of them are loaded concurrently, sharing this loader's
+        connection pool; works is loaded once they have all succeeded. Each
+        entity loading at the same time gets an equal share of the pool, so
+        file threads do not pile up waiting for a connection.
+        """
+        max_workers = max(1, min(len(LOAD_STAGES[0]), int(os.getenv("ENTITY_PARALLELISM", 5))))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for entities in LOAD_STAGES:
+                workers = max(1, self.max_workers // min(len(entities), max_workers))
+                futures = {
+                    executor.submit(self.load_entity, entity, workers=workers): entity
+                    for entity in entities
+                }
+                for future in as_completed(futures):
+                    if not future.result():
+                        logging.error(f"Failed to load {futures[future]}")
+                        for pending in futures:
+                            pending.cancel()
+                        return False
         return True
 
 if __name__ == "__main__":
@@ -81,5 +184,5 @@ if __name__ == "__main__":
         "password": os.environ.get("DB_PASSWORD")
     }
     
-    loader = OpenAlexLoader(base_dir, db_config)
-    loader.load_all_entities()
+    with OpenAlexLoader(base_dir, db_config) as loader:
+        loader.load_all_entities()
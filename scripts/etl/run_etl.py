@@ -2,9 +2,13 @@
 import os
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from download.s3_downloader import OpenAlexDownloader
 from transform.json_to_csv import OpenAlexTransformer
-from load.db_loader import OpenAlexLoader
+from load.db_loader import OpenAlexLoader, LOAD_STAGES
+
+# Entity types in load order: works after the entities it references
+ENTITIES = [entity for stage in LOAD_STAGES for entity in stage]
 
 def setup_logging(base_dir):
     log_dir = os.path.join(base_dir, 'logs', 'etl')
@@ -23,20 +27,8 @@ def run_etl(base_dir):
     logging.info("Starting ETL process")
     
     try:
-        # Download data
-        logging.info("Starting download phase")
         downloader = OpenAlexDownloader(base_dir)
-        if not downloader.download_all_entities():
-            raise Exception("Download phase failed")
-        
-        # Transform data
-        logging.info("Starting transform phase")
         transformer = OpenAlexTransformer(base_dir)
-        if not transformer.transform_all_entities():
-            raise Exception("Transform phase failed")
-        
-        # Load data
-        logging.info("Starting load phase")
         db_config = {
             "host": "localhost",
             "port": 5432,
@@ -45,8 +37,29 @@ def run_etl(base_dir):
             "password": os.environ.get("DB_PASSWORD")
         }
         loader = OpenAlexLoader(base_dir, db_config)
-        if not loader.load_all_entities():
-            raise Exception("Load phase failed")
+
+        # Entities go through download -> transform -> load one at a time, in
+        # load order. The next entity is downloaded in the background while the
+        # current one is transformed and loaded (at most one prefetch ahead).
+        try:
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                next_download = prefetcher.submit(downloader.download_entity, ENTITIES[0])
+                for i, entity in enumerate(ENTITIES):
+                    logging.info(f"Starting download phase for {entity}")
+                    if not next_download.result():
+                        raise Exception(f"Download phase failed for {entity}")
+                    if i + 1 < len(ENTITIES):
+                        next_download = prefetcher.submit(downloader.download_entity, ENTITIES[i + 1])
+
+                    logging.info(f"Starting transform phase for {entity}")
+                    if not transformer.transform_entity(entity):
+                        raise Exception(f"Transform phase failed for {entity}")
+
+                    logging.info(f"Starting load phase for {entity}")
+                    if not loader.load_entity(entity):
+                        raise Exception(f"Load phase failed for {entity}")
+        finally:
+            loader.close()
         
         logging.info("ETL process completed successfully")
         return True
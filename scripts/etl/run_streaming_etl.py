@@ -9,6 +9,7 @@ from configs.database.db_config import DB_CONFIG
 from scripts.etl.download.streaming_downloader import StreamingDownloader
 from scripts.etl.transform.streaming_processor import StreamingProcessor
 from scripts.etl.utils.state_manager import StateManager
+from scripts.etl.utils.streaming_base import rotating_file_handler
 
 class ETLManager:
     def __init__(self, base_dir):
@@ -16,6 +17,8 @@ class ETLManager:
         self.setup_logging()
         self.state_manager = StateManager(base_dir)
         self.running = True
+        # Set on shutdown so the monitor wakes immediately instead of sleeping
+        self._stop = threading.Event()
         self.downloader = None
         self.processor = None
         self.setup_signal_handlers()
@@ -31,7 +34,7 @@ class ETLManager:
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(log_file),
+                rotating_file_handler(log_file),
                 logging.StreamHandler()
             ]
         )
@@ -41,6 +44,7 @@ class ETLManager:
         def signal_handler(signum, frame):
             logging.info("Received shutdown signal. Cleaning up...")
             self.running = False
+            self._stop.set()
             if self.processor:
                 self.processor.close()
             sys.exit(0)
@@ -56,12 +60,11 @@ class ETLManager:
                     # Use get_state_summary instead of load_state
                     state = self.state_manager.get_state_summary()
                     logging.info(f"Current progress: {state}")
-                    import time
-                    time.sleep(300)  # Monitor every 5 minutes
                 except Exception as e:
                     logging.error(f"Monitoring error: {str(e)}")
-                    import time
-                    time.sleep(300)  # Prevent rapid error logging
+                # Monitor every 5 minutes (also prevents rapid error logging)
+                if self._stop.wait(300):
+                    break
 
         monitor_thread = threading.Thread(target=monitor, daemon=True)
         monitor_thread.start()
@@ -100,8 +103,8 @@ class ETLManager:
 
                 logging.info(f"Starting processing of {entity_type}")
                 
-                def process_callback(file_path):
-                    return self.processor.process_file(file_path, entity_type)
+                def process_callback(file_path, full_path):
+                    return self.processor.process_file(file_path, entity_type, checkpoint_key=full_path)
                 
                 success = self.downloader.process_entity(entity_type, process_callback)
                 
@@ -1,17 +1,208 @@
 # scripts/etl/transform/json_to_csv.py
 import os
-import json
+import io
 import gzip
+import orjson
 import csv
+import itertools
 import logging
 from datetime import datetime
 from typing import Dict, List, Any
 
+try:
+    import simdjson
+except ImportError:  # pysimdjson is optional; fall back to orjson
+    simdjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for Parquet output
+    pa = pq = None
+
+_OBJECT_TYPES = (dict, simdjson.Object) if simdjson else (dict,)
+_ARRAY_TYPES = (list, simdjson.Array) if simdjson else (list,)
+
+# Decompressed bytes pulled per read from a gzip shard
+READ_BUFFER_SIZE = 128 * 1024
+
+# Leading records whose fields make up a file's CSV header
+SCHEMA_SAMPLE_LINES = 1000
+
+# Rows buffered before each csv writerows call
+WRITE_BATCH_ROWS = int(os.getenv('TRANSFORM_WRITE_BATCH', 10000))
+
+# Rows per Parquet row group when TRANSFORM_FORMAT=parquet
+PARQUET_ROW_GROUP_ROWS = 100000
+
+# Stand-in for missing or null nested objects in generated flatteners
+_EMPTY = {}
+
+def _dump_array(value, _dumps=orjson.dumps):
+    """
+    Serialize a list leaf for CSV output.
+
+    orjson writes the JSON text in one native call; simdjson arrays hand
+    back their minified source text without being materialized.
+
+    :param value: Leaf value read from a record
+    :return: JSON text for lists, the value itself otherwise
+    """
+    if type(value) is list:
+        return _dumps(value).decode()
+    if simdjson is not None and isinstance(value, simdjson.Array):
+        return value.mini
+    return value
+
+class _SchemaMismatch(Exception):
+    """Raised by a generated flattener for a record with fields outside its schema."""
+
+class _ColumnTypeMismatch(Exception):
+    """Raised by _write_parquet for a row group that does not fit the file's column types."""
+
+    def __init__(self, types):
+        super().__init__(types)
+        # Arrow type per column, widened to hold the offending row group
+        self.types = types
+
+def _has_leaves(obj) -> bool:
+    """
+    Check whether an object would produce any flattened column.
+
+    :param obj: Parsed object
+    :return: False if it holds nothing but (nested) empty objects
+    """
+    stack = [obj]
+    while stack:
+        for value in stack.pop().values():
+            if not isinstance(value, _OBJECT_TYPES):
+                return True
+            stack.append(value)
+    return False
+
+def _check_unseen(obj, known):
+    """
+    Reject an object holding keys a generated flattener has no column for.
+
+    Keys whose value is an empty object are allowed, as flatten_json gives
+    them no column either.
+
+    :param obj: Parsed object bound by a generated flattener
+    :param known: Keys of obj covered by the flattener's schema
+    """
+    for key, value in obj.items():
+        if key not in known and (not isinstance(value, _OBJECT_TYPES) or _has_leaves(value)):
+            raise _SchemaMismatch(key)
+
+def _dump_leaf(value):
+    """
+    Convert a leaf value read by a generated flattener to a cell value.
+
+    Lists become JSON text, as in flatten_json, so no Python repr or parser
+    proxy reaches the output. Objects with fields are outside the schema
+    and raise _SchemaMismatch; empty ones are written as JSON text.
+
+    :param value: Leaf value read from a record
+    :return: JSON text for containers, the value itself otherwise
+    """
+    if isinstance(value, _ARRAY_TYPES):
+        return _dump_array(value)
+    if isinstance(value, _OBJECT_TYPES) and _has_leaves(value):
+        raise _SchemaMismatch(value)
+    if type(value) is dict:
+        return orjson.dumps(value).decode()
+    if simdjson is not None and isinstance(value, simdjson.Object):
+        return value.mini
+    return value
+
+def _text_array(values):
+    """
+    Build an Arrow string array, writing non-string scalars as text.
+
+    :param values: Column values of a row group
+    :return: pyarrow string array
+    """
+    return pa.array([v if v is None or type(v) is str else str(v) for v in values], type=pa.string())
+
+def _column_array(values):
+    """
+    Build an Arrow array for one column of a row group, inferring its type.
+
+    Columns mixing strings or booleans with other scalars, or holding
+    integers beyond int64, are written as text, as in the CSV output.
+
+    :param values: Column values of a row group
+    :return: pyarrow array
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return _text_array(values)
+
+def _fit_column(array, values, arrow_type):
+    """
+    Convert a row group column to the type the file declares for it.
+
+    :param array: Column array with its inferred type
+    :param values: Column values the array was built from
+    :param arrow_type: Type of the column in the file
+    :return: Array of arrow_type, or None if the values need a wider type
+    """
+    if array.type == arrow_type:
+        return array
+    if pa.types.is_string(arrow_type):
+        return _text_array(values)
+    if pa.types.is_null(array.type) or (pa.types.is_floating(arrow_type) and pa.types.is_integer(array.type)):
+        try:
+            return array.cast(arrow_type)
+        except pa.ArrowInvalid:
+            # Integers too large for an exact float64
+            return None
+    return None
+
+def _widen(arrow_type, other):
+    """
+    Pick a column type holding the values of both types.
+
+    Integers and floats widen to float64, anything else to string. The
+    result is always wider than arrow_type, so rewrites terminate.
+
+    :param arrow_type: Current type of the column
+    :param other: Inferred type of the values that did not fit
+    :return: pyarrow type
+    """
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if (
+        not pa.types.is_floating(arrow_type)
+        and any(check(arrow_type) for check in numeric)
+        and any(check(other) for check in numeric)
+    ):
+        return pa.float64()
+    return pa.string()
+
 class OpenAlexTransformer:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, output_format=None):
+        """
+        Initialize the transformer.
+
+        :param base_dir: Base directory for the ETL process
+        :param output_format: 'csv' (default, what OpenAlexLoader reads) or
+            'parquet' (zstd-compressed, e.g. for BigQuery loads); defaults to
+            TRANSFORM_FORMAT
+        """
         self.base_dir = base_dir
+        self.output_format = output_format or os.getenv('TRANSFORM_FORMAT', 'csv')
+        if self.output_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported output format: {self.output_format}")
+        if self.output_format == 'parquet' and pa is None:
+            raise ImportError("pyarrow is required for Parquet output")
         self.raw_dir = os.path.join(base_dir, 'data', 'raw')
         self.processed_dir = os.path.join(base_dir, 'data', 'processed')
+        # simdjson parses into lazy proxies, so nested lists are never built
+        # as Python objects; a parser holds one document at a time
+        self._parse = simdjson.Parser().parse if simdjson else orjson.loads
+        # Generated flatten functions keyed by record schema
+        self._flatteners = {}
         self.setup_logging()
 
     def setup_logging(self):
@@ -26,19 +217,123 @@ class OpenAlexTransformer:
 
     def flatten_json(self, json_obj: Dict, prefix: str = '') -> Dict:
         """Flatten nested JSON object."""
+        # Walk with an explicit stack of item iterators instead of recursing,
+        # so no intermediate dicts are built and merged per nesting level
         flattened = {}
-        for key, value in json_obj.items():
-            if isinstance(value, dict):
-                flattened.update(self.flatten_json(value, f"{prefix}{key}_"))
-            elif isinstance(value, list):
+        object_types, array_types, dump_array = _OBJECT_TYPES, _ARRAY_TYPES, _dump_array
+        stack = [(prefix, iter(json_obj.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            for key, value in items:
+                if isinstance(value, object_types):
+                    stack.append((prefix + key + '_', iter(value.items())))
+                    break
                 # Handle lists appropriately based on your needs
-                flattened[f"{prefix}{key}"] = json.dumps(value)
+                flattened[prefix + key] = dump_array(value) if isinstance(value, array_types) else value
             else:
-                flattened[f"{prefix}{key}"] = value
+                stack.pop()
         return flattened
 
+    def schema_paths(self, json_obj, path: tuple = ()) -> List:
+        """
+        List the leaf paths of a record in flatten_json column order.
+
+        :param json_obj: Parsed sample record
+        :param path: Key path of json_obj within the record
+        :return: List of (key path, is_array) tuples
+        """
+        paths = []
+        object_types, array_types = _OBJECT_TYPES, _ARRAY_TYPES
+        stack = [(path, iter(json_obj.items()))]
+        while stack:
+            path, items = stack[-1]
+            for key, value in items:
+                if isinstance(value, object_types):
+                    stack.append((path + (key,), iter(value.items())))
+                    break
+                paths.append((path + (key,), isinstance(value, array_types)))
+            else:
+                stack.pop()
+        return paths
+
+    def merge_schema(self, path_lists) -> tuple:
+        """
+        Union the leaf paths of several records, keeping first-seen order.
+
+        A path that is an object in some records and a scalar or null in
+        others is kept as an object, so its nested fields get columns.
+
+        :param path_lists: Iterable of schema_paths results
+        :return: Tuple of (key path, is_array)
+        """
+        merged = {}
+        for paths in path_lists:
+            for path, is_array in paths:
+                merged[path] = merged.get(path, False) or is_array
+        objects = {path[:depth] for path in merged for depth in range(1, len(path))}
+        return tuple((path, is_array) for path, is_array in merged.items() if path not in objects)
+
+    def compile_flattener(self, paths: tuple):
+        """
+        Generate a flatten function specialized to one record schema.
+
+        The generated function reads every known path directly and returns
+        the row as a tuple, so no recursion or key string building happens
+        per record. Values are type-checked, since later records need not
+        match the sample: a parent that is not an object reads as empty and
+        a list found at any leaf is written as JSON text. A record with keys
+        outside the schema raises _SchemaMismatch instead of losing them.
+
+        :param paths: Tuple of (key path, is_array) from merge_schema
+        :return: Function mapping a parsed record to a row tuple
+        """
+        flattener = self._flatteners.get(paths)
+        if flattener:
+            return flattener
+
+        names = {(): 'o'}
+        lines = []
+        items = []
+        namespace = {}
+
+        def check_keys(obj_path):
+            # Keys of the object at obj_path that the schema has columns for
+            known = f"_K{len(namespace)}"
+            namespace[known] = frozenset(path[len(obj_path)] for path, _ in paths if path[:len(obj_path)] == obj_path)
+            return f"not {known}.issuperset({names[obj_path]}):\n        _check_unseen({names[obj_path]}, {known})\n"
+
+        lines.append(f"    if {check_keys(())}")
+        for path, is_array in paths:
+            # Bind each nested object once; missing, null or non-object
+            # parents read as empty
+            for depth in range(1, len(path)):
+                parent = path[:depth]
+                if parent not in names:
+                    name = names[parent] = f"o{len(names)}"
+                    lines.append(f"    {name} = {names[parent[:-1]]}.get({parent[-1]!r})\n")
+                    lines.append(f"    if not isinstance({name}, _OBJECT_TYPES):\n        {name} = _EMPTY\n")
+                    lines.append(f"    elif {check_keys(parent)}")
+            access = f"{names[path[:-1]]}.get({path[-1]!r})"
+            if is_array:
+                items.append(f"_dump_leaf({access})")
+            else:
+                # Scalars pass through without a call; containers are dumped
+                items.append(f"(_dump_leaf(v) if isinstance(v := {access}, _CONTAINER_TYPES) else v)")
+
+        source = "def flatten(o):\n" + "".join(lines) + "    return (" + "".join(f"{item}, " for item in items) + ")\n"
+        namespace.update({
+            '_EMPTY': _EMPTY,
+            '_OBJECT_TYPES': _OBJECT_TYPES,
+            '_CONTAINER_TYPES': _OBJECT_TYPES + _ARRAY_TYPES,
+            '_dump_leaf': _dump_leaf,
+            '_check_unseen': _check_unseen,
+        })
+        exec(compile(source, '<flatten>', 'exec'), namespace)
+        flattener = self._flatteners[paths] = namespace['flatten']
+        return flattener
+
     def transform_entity(self, entity_type: str):
-        """Transform JSON Lines files to CSV for a specific entity type."""
+        """Transform JSON Lines files to CSV (or Parquet) for a specific entity type."""
         input_dir = os.path.join(self.raw_dir, entity_type)
         output_dir = os.path.join(self.processed_dir, entity_type)
         os.makedirs(output_dir, exist_ok=True)
@@ -46,35 +341,19 @@ class OpenAlexTransformer:
         logging.info(f"Starting transformation of {entity_type}")
 
         try:
-            # Process each gzipped file in the input directory
-            for filename in os.listdir(input_dir):
-                if not filename.endswith('.gz'):
-                    continue
-
-                input_path = os.path.join(input_dir, filename)
-                output_path = os.path.join(output_dir, f"{os.path.splitext(filename)[0]}.csv")
-
-                with gzip.open(input_path, 'rt') as f_in, \
-                     open(output_path, 'w', newline='') as f_out:
-                    
-                    # Read first line to get fields
-                    first_line = f_in.readline()
-                    first_obj = json.loads(first_line)
-                    flattened_obj = self.flatten_json(first_obj)
-                    fieldnames = list(flattened_obj.keys())
-
-                    # Setup CSV writer
-                    writer = csv.DictWriter(f_out, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerow(flattened_obj)
-
-                    # Process remaining lines
-                    for line in f_in:
-                        obj = json.loads(line)
-                        flattened = self.flatten_json(obj)
-                        writer.writerow(flattened)
-
-                logging.info(f"Transformed {filename} to CSV")
+            # Process each gzipped file in the input directory; DirEntry
+            # carries the file type, so filtering needs no extra stat calls
+            with os.scandir(input_dir) as it:
+                input_files = [
+                    (entry.name, entry.path) for entry in it
+                    if entry.is_file(follow_symlinks=False) and entry.name.endswith('.gz')
+                ]
+
+            for filename, input_path in input_files:
+                output_path = os.path.join(output_dir, f"{os.path.splitext(filename)[0]}.{self.output_format}")
+
+                self._transform_file(input_path, output_path)
+                logging.info(f"Transformed {filename} to {self.output_format.upper()}")
 
             return True
 
@@ -82,6 +361,152 @@ class OpenAlexTransformer:
             logging.error(f"Error transforming {entity_type}: {str(e)}")
             return False
 
+    def _transform_file(self, input_path: str, output_path: str):
+        """
+        Flatten one gzipped JSON Lines file, writing it again when needed.
+
+        The first pass uses a flattener for the leading records' fields. If
+        a later record has fields they lack, the file is written again with
+        the schema of the whole file; if a Parquet row group does not fit
+        the column types, it is written again with widened types.
+
+        :param input_path: Path of the .gz file
+        :param output_path: Path of the output file
+        """
+        filename = os.path.basename(input_path)
+        types = None
+        with self._open_input(input_path) as f_in:
+            # Sample the leading lines to get the union of their fields and
+            # a flattener specialized to it
+            sample = list(itertools.islice(f_in, SCHEMA_SAMPLE_LINES))
+            paths = self.merge_schema(self.schema_paths(self._parse(line)) for line in sample)
+            try:
+                self._write_rows(itertools.chain(sample, f_in), paths, output_path)
+                return
+            except _SchemaMismatch:
+                full_schema = True
+            except _ColumnTypeMismatch as e:
+                full_schema = False
+                types = e.types
+
+        while True:
+            if full_schema:
+                # A later record has fields the sample lacked: take the
+                # schema from the whole file
+                with self._open_input(input_path) as f_in:
+                    full_paths = self.merge_schema(self.schema_paths(self._parse(line)) for line in f_in)
+                sampled = {path for path, _ in paths}
+                added = ['_'.join(path) for path, _ in full_paths if path not in sampled]
+                logging.warning(
+                    f"{filename} has fields missing from its first {SCHEMA_SAMPLE_LINES} records, "
+                    f"rewriting with the full schema; added columns: {', '.join(added)}"
+                )
+                paths = full_paths
+                types = None
+            else:
+                logging.warning(f"{filename} has values outside the column types of its first rows, rewriting with wider types")
+            try:
+                with self._open_input(input_path) as f_in:
+                    self._write_rows(f_in, paths, output_path, types)
+                return
+            except _SchemaMismatch:
+                full_schema = True
+            except _ColumnTypeMismatch as e:
+                full_schema = False
+                types = e.types
+
+    @staticmethod
+    def _open_input(input_path: str):
+        """
+        Open a gzipped JSON Lines file for buffered line reads.
+
+        :param input_path: Path of the .gz file
+        :return: Binary file object yielding one record per line
+        """
+        return io.BufferedReader(gzip.open(input_path, 'rb'), buffer_size=READ_BUFFER_SIZE)
+
+    def _write_rows(self, lines, paths: tuple, output_path: str, types=None):
+        """
+        Flatten records and write them in the configured output format.
+
+        :param lines: Iterable of JSON lines
+        :param paths: Tuple of (key path, is_array) from merge_schema
+        :param output_path: Path of the output file
+        :param types: Parquet column types, inferred when None
+        :raises _SchemaMismatch: If a record has fields outside paths
+        :raises _ColumnTypeMismatch: If Parquet values do not fit the column types
+        """
+        fieldnames = ['_'.join(path) for path, _ in paths]
+        flatten = self.compile_flattener(paths)
+
+        # Parsed documents are never bound to a name, so the simdjson
+        # parser can be reused as soon as each row is built
+        rows = map(flatten, map(self._parse, lines))
+        if self.output_format == 'parquet':
+            self._write_parquet(rows, fieldnames, output_path, types)
+        else:
+            self._write_csv(rows, fieldnames, output_path)
+
+    def _write_csv(self, rows, fieldnames: List[str], output_path: str):
+        """
+        Write flattened rows to a CSV file with a header.
+
+        :param rows: Iterator of row tuples
+        :param fieldnames: Column names
+        :param output_path: Path of the CSV file
+        """
+        with open(output_path, 'w', newline='', encoding='utf-8') as f_out:
+            # Rows are positional tuples so no per-row dict lookups happen
+            # on write; they go out in blocks of rows
+            writer = csv.writer(f_out)
+            writer.writerow(fieldnames)
+            while True:
+                block = list(itertools.islice(rows, WRITE_BATCH_ROWS))
+                if not block:
+                    break
+                writer.writerows(block)
+
+    def _write_parquet(self, rows, fieldnames: List[str], output_path: str, types=None):
+        """
+        Write flattened rows to a zstd-compressed Parquet file.
+
+        Unless given, column types are those inferred for the first row
+        group; columns that are entirely null there are typed as strings.
+        Every row group is inferred the same way and checked against them,
+        since a converting pa.array would silently truncate e.g. floats in
+        an int64 column.
+
+        :param rows: Iterator of row tuples
+        :param fieldnames: Column names
+        :param output_path: Path of the Parquet file
+        :param types: Arrow type per column, e.g. from _ColumnTypeMismatch
+        :raises _ColumnTypeMismatch: If a row group does not fit the types
+        """
+        writer = None
+        try:
+            while True:
+                block = list(itertools.islice(rows, PARQUET_ROW_GROUP_ROWS))
+                if not block:
+                    break
+                # Transpose to one sequence per column for Arrow
+                columns = list(zip(*block))
+                arrays = [_column_array(column) for column in columns]
+                if types is None:
+                    types = [pa.string() if pa.types.is_null(array.type) else array.type for array in arrays]
+                fitted = [_fit_column(*args) for args in zip(arrays, columns, types)]
+                if any(array is None for array in fitted):
+                    raise _ColumnTypeMismatch([
+                        _widen(arrow_type, array.type) if fit is None else arrow_type
+                        for fit, array, arrow_type in zip(fitted, arrays, types)
+                    ])
+                if writer is None:
+                    schema = pa.schema(list(zip(fieldnames, types)))
+                    writer = pq.ParquetWriter(output_path, schema, compression='zstd')
+                writer.write_table(pa.Table.from_arrays(fitted, schema=schema))
+        finally:
+            if writer is not None:
+                writer.close()
+
     def transform_all_entities(self):
         """Transform all entity types."""
         entities = ['works', 'authors', 'concepts', 'institutions', 'venues']
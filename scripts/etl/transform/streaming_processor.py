@@ -1,36 +1,254 @@
 # scripts/etl/transform/streaming_processor.py
+import collections
 import gzip
-import json
+import io
+import os
 import logging
-import psycopg2
-from psycopg2.extras import execute_values
+import multiprocessing
+import operator
+import orjson
+import queue
+import sys
+import threading
+import time
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 import traceback
-from ..utils.streaming_base import StreamingBase
+from ..utils.streaming_base import StreamingBase, enable_queue_logging
 from ..utils.entity_processors import EntityProcessors
 from ..utils.state_manager import StateManager
 
+try:
+    import rapidgzip
+except ImportError:  # optional; single-threaded gzip is used without it
+    rapidgzip = None
+
+# Batch groups collected by process_file; taxonomy keys cover the newer
+# OpenAlex entities
+BATCH_KEYS = (
+    'main', 'ids', 'counts_by_year', 'authorships', 'related_works',
+    'referenced_works', 'concepts', 'open_access', 'geo',
+    'associated_institutions', 'domains', 'fields', 'subfields', 'topics',
+    'publishers'
+)
+
+# Batch groups of each entity type as (batch key, table) pairs; processors
+# emit each group under its table name
+ENTITY_BATCHES = {
+    'works': (
+        ('main', 'works'),
+        ('ids', 'works_ids'),
+        ('open_access', 'works_open_access'),
+        ('authorships', 'works_authorships'),
+        ('related_works', 'works_related_works'),
+        ('referenced_works', 'works_referenced_works'),
+        ('concepts', 'works_concepts'),
+        ('counts_by_year', 'works_counts_by_year')
+    ),
+    'authors': (
+        ('main', 'authors'),
+        ('ids', 'authors_ids'),
+        ('counts_by_year', 'authors_counts_by_year'),
+        ('concepts', 'authors_concepts')
+    ),
+    'sources': (
+        ('main', 'sources'),
+        ('ids', 'sources_ids'),
+        ('counts_by_year', 'sources_counts_by_year')
+    ),
+    'institutions': (
+        ('main', 'institutions'),
+        ('ids', 'institutions_ids'),
+        ('geo', 'institutions_geo'),
+        ('counts_by_year', 'institutions_counts_by_year'),
+        ('associated_institutions', 'institutions_associated_institutions')
+    ),
+    'domains': (
+        ('main', 'domains'),
+        ('counts_by_year', 'domains_counts_by_year')
+    ),
+    'fields': (
+        ('main', 'fields'),
+        ('counts_by_year', 'fields_counts_by_year')
+    ),
+    'subfields': (
+        ('main', 'subfields'),
+        ('counts_by_year', 'subfields_counts_by_year')
+    ),
+    'topics': (
+        ('main', 'topics'),
+        ('counts_by_year', 'topics_counts_by_year')
+    ),
+    'publishers': (
+        ('main', 'publishers'),
+        ('ids', 'publishers_ids'),
+        ('counts_by_year', 'publishers_counts_by_year')
+    )
+}
+
+# Flush thresholds for the wide child groups, which grow several rows per
+# main record
+CHILD_BATCH_SIZES = {
+    'authorships': 50000,
+    'referenced_works': 50000,
+    'related_works': 50000,
+    'concepts': 50000,
+    'counts_by_year': 50000,
+}
+
+# Minimum seconds between per-file progress log lines
+PROGRESS_LOG_INTERVAL = 30.0
+
+# Characters handed to COPY per read of a batch payload
+COPY_CHUNK_SIZE = 1 << 20
+
+# Session settings for bulk loading, passed as libpq startup options
+SESSION_OPTIONS = '-c synchronous_commit=off -c work_mem=256MB -c maintenance_work_mem=1GB'
+
+# Parsed batches allowed to wait for the database per file
+LOAD_QUEUE_SIZE = int(os.getenv('LOAD_QUEUE_SIZE', 4))
+
+# Decompressed bytes pulled per read from a gzip shard
+READ_BUFFER_SIZE = 128 * 1024
+# Buffer in front of rapidgzip, which decodes whole blocks in parallel
+PARALLEL_READ_BUFFER_SIZE = 1 << 20
+
+# Worker processes parsing and processing records; 0 keeps it on the reader
+# thread
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 0))
+# Decompressed bytes of whole lines handed to a parse worker at a time
+PARSE_CHUNK_BYTES = 8 << 20
+
+# Escapes for COPY text format fields
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def _copy_text(value) -> str:
+    """
+    Render a value as a COPY text format field.
+
+    :param value: Column value from a processed record
+    :return: Escaped field text, with \\N for NULL
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode().translate(_COPY_ESCAPES)
+    return str(value)
+
+def _process_chunk(entity_type: str, chunk: bytes) -> tuple:
+    """
+    Parse and process a chunk of JSON Lines in a parse worker process.
+
+    :param entity_type: Type of entity being processed
+    :param chunk: Whole newline-terminated lines of the shard
+    :return: Tuple of (batches, line count, [(line index, error message)])
+    """
+    processor = EntityProcessors.get_processor(entity_type)
+    collect = StreamingProcessor._collect_batches
+    loads = orjson.loads
+    batches = StreamingProcessor._new_batches()
+    errors = []
+    lines = chunk.split(b'\n')
+    if not lines[-1]:
+        lines.pop()
+    for index, line in enumerate(lines):
+        try:
+            processed_data = processor(loads(line))
+            if processed_data:
+                collect(entity_type, processed_data, batches)
+        except orjson.JSONDecodeError as e:
+            errors.append((index, f"JSON decode error: {str(e)}"))
+        except Exception as e:
+            errors.append((index, f"{str(e)}\n{traceback.format_exc()}"))
+    return batches, len(lines), errors
+
+class _CopyStream:
+    """File-like reader over an iterator of COPY text lines, for copy_expert."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._pending = ''
+
+    def read(self, size=-1):
+        """
+        Read up to size characters, pulling lines from the iterator.
+
+        :param size: Maximum characters to return, or -1 for everything
+        :return: Text chunk, empty once the iterator is exhausted
+        """
+        parts = [self._pending]
+        total = len(self._pending)
+        for line in self._lines:
+            parts.append(line)
+            total += len(line)
+            if 0 <= size <= total:
+                break
+        data = ''.join(parts)
+        if 0 <= size < len(data):
+            self._pending = data[size:]
+            return data[:size]
+        self._pending = ''
+        return data
+
 class StreamingProcessor(StreamingBase):
-    def __init__(self, base_dir, db_config, batch_size=1000, max_errors=100):
+    def __init__(self, base_dir, db_config, batch_size=10000, max_errors=100, batch_sizes=None, max_connections=8):
         """
         Initialize the StreamingProcessor.
 
         :param base_dir: Base directory for the ETL process
         :param db_config: Database configuration dictionary
-        :param batch_size: Number of records to process in a batch
+        :param batch_size: Number of main records to process in a batch
         :param max_errors: Maximum number of errors before stopping processing
+        :param batch_sizes: Optional per batch key overrides of CHILD_BATCH_SIZES
+        :param max_connections: Database connections used to load batch groups in parallel
         """
         super().__init__(base_dir, "processor")
+        # Handler I/O moves to a listener thread, off the load loop
+        enable_queue_logging()
         self.db_config = db_config
-        self.conn = None
+        self.max_connections = max_connections
+        # ThreadedConnectionPool raises when exhausted, so loaders wait on
+        # the semaphore for a free connection instead
+        self._pool = None
+        self._pool_slots = threading.BoundedSemaphore(max_connections)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections)
+        # Load statements keyed by (entity_type, batch_key, columns); record
+        # shapes are stable, so these hit after the first batch
+        self._sql_cache = {}
         self.batch_size = batch_size
+        # Batches are flushed as soon as any group reaches its threshold
+        self.batch_sizes = {**CHILD_BATCH_SIZES, 'main': batch_size, **(batch_sizes or {})}
         self.max_errors = max_errors
         self.state_manager = StateManager(base_dir)
+        self.gzip_parallelism = int(os.getenv('GZIP_PARALLELISM', os.cpu_count() or 1))
+        self._parse_pool = self._create_parse_pool() if PARSE_WORKERS > 0 else None
         self.connect()
 
+    @staticmethod
+    def _create_parse_pool():
+        """
+        Create the executor for parse workers.
+
+        Parsing is GIL-bound, so it scales out to processes, spawned rather
+        than forked because this process already runs threads. Free-threaded
+        interpreters run it on threads instead, which skips pickling chunks
+        and results.
+
+        :return: Executor with PARSE_WORKERS workers
+        """
+        is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+        if is_gil_enabled is not None and not is_gil_enabled():
+            return ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+        return ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
     def connect(self):
         """
-        Establish a database connection with retry mechanism.
+        Establish the database connection pool with retry mechanism.
         
         :return: True if connection is successful, False otherwise
         """
@@ -39,9 +257,17 @@ class StreamingProcessor(StreamingBase):
         
         while retry_count < max_retries:
             try:
-                if self.conn is None or self.conn.closed:
-                    self.conn = psycopg2.connect(**self.db_config)
-                    self.conn.autocommit = False
+                if self._pool is None or self._pool.closed:
+                    # Bulk-load session tuning, applied to every pooled
+                    # connection at startup. With synchronous_commit off, a
+                    # commit returns before its WAL is flushed, so a server
+                    # crash can lose the last few batches; files are only
+                    # marked complete after processing, so they get redone.
+                    options = ' '.join(filter(None, [self.db_config.get('options'), SESSION_OPTIONS]))
+                    self._pool = ThreadedConnectionPool(
+                        minconn=1, maxconn=self.max_connections,
+                        **{**self.db_config, 'options': options}
+                    )
                     logging.info("Database connection established")
                 return True
             except Exception as e:
@@ -49,15 +275,51 @@ class StreamingProcessor(StreamingBase):
                 logging.error(f"Database connection error (attempt {retry_count}): {str(e)}")
                 if retry_count == max_retries:
                     raise
-                import time
                 time.sleep(5)  # Wait before retrying
 
-    def process_file(self, file_path, entity_type):
+    def get_connection(self):
+        """Get a pooled database connection; return it with release_connection."""
+        self._pool_slots.acquire()
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._pool_slots.release()
+            raise
+
+    def release_connection(self, conn):
+        """Return a connection obtained from get_connection to the pool."""
+        try:
+            self._pool.putconn(conn)
+        finally:
+            self._pool_slots.release()
+
+    def open_shard(self, file_path):
+        """
+        Open a gzipped JSON Lines shard for buffered binary line iteration.
+
+        Local files are decompressed in parallel with rapidgzip when it is
+        installed; streams and environments without it use stdlib gzip.
+
+        :param file_path: Path to the shard, or an open binary stream of it
+        :return: Binary file object yielding decompressed lines
+        """
+        if rapidgzip is not None and isinstance(file_path, (str, os.PathLike)):
+            return io.BufferedReader(
+                rapidgzip.open(file_path, parallelization=self.gzip_parallelism),
+                buffer_size=PARALLEL_READ_BUFFER_SIZE
+            )
+        return io.BufferedReader(gzip.open(file_path, 'rb'), buffer_size=READ_BUFFER_SIZE)
+
+    def process_file(self, file_path, entity_type, checkpoint_key=None):
         """
         Process a gzipped JSON Lines file and load to database.
 
-        :param file_path: Path to the gzipped JSON Lines file
+        :param file_path: Path to the gzipped JSON Lines file, or an open
+            binary stream of it (e.g. an S3 response body)
         :param entity_type: Type of entity being processed
+        :param checkpoint_key: Key the file's resume point is stored under,
+            unique across updated_date folders (the downloader passes the
+            file's full path); no checkpoint is kept without it
         :return: True if processing is successful, False otherwise
         """
         processor = EntityProcessors.get_processor(entity_type)
@@ -65,85 +327,182 @@ class StreamingProcessor(StreamingBase):
             logging.error(f"No processor found for entity type: {entity_type}")
             return False
 
-        # Expanded batch dictionary to support all potential entities
-        current_batches = {
-            'main': [],
-            'ids': [],
-            'counts_by_year': [],
-            'authorships': [],
-            'related_works': [],
-            'referenced_works': [],
-            'concepts': [],
-            'open_access': [],
-            'geo': [],
-            'associated_institutions': [],
-            # New taxonomy entities
-            'domains': [],
-            'fields': [],
-            'subfields': [],
-            'topics': [],
-            'publishers': []
-        }
-        
-        records_processed = 0
-        errors = 0
+        # A reader thread decompresses, parses and groups records into
+        # batches while this thread loads finished batches, so parsing
+        # overlaps with database round-trips. The connection is only ever
+        # used from this thread.
+        # Local files resume from the last checkpoint after a crash; streams
+        # cannot seek and always start over
+        checkpoint_name = checkpoint_key if isinstance(file_path, (str, os.PathLike)) else None
+        checkpoint = checkpoint_name and self.state_manager.get_checkpoint(entity_type, checkpoint_name)
 
-        try:
-            with gzip.open(file_path, 'rt') as f:
-                for line_number, line in enumerate(f, 1):
-                    try:
-                        data = json.loads(line)
-                        processed_data = processor(data)
-                        
-                        if processed_data:
-                            self._collect_batches(entity_type, processed_data, current_batches)
-                        
-                        # Load batches when they reach the batch size
-                        if len(current_batches['main']) >= self.batch_size:
-                            if not self.load_batches(entity_type, current_batches):
-                                errors += 1
-                                if errors >= self.max_errors:
-                                    logging.error(f"Too many errors ({errors}). Stopping processing.")
-                                    return False
-                            
-                            records_processed += len(current_batches['main'])
-                            
-                            # Reset batches
-                            for key in current_batches:
-                                current_batches[key] = []
-                            
-                            logging.info(f"Processed {records_processed} records from {file_path}")
-
-                    except json.JSONDecodeError as e:
-                        errors += 1
-                        logging.error(f"JSON decode error in {file_path} at line {line_number}: {str(e)}")
-                        if errors >= self.max_errors:
-                            return False
-                        continue
-                    except Exception as e:
-                        errors += 1
-                        logging.error(f"Error processing line {line_number} in {file_path}: {str(e)}")
-                        logging.error(traceback.format_exc())
-                        if errors >= self.max_errors:
-                            return False
-                        continue
+        ready = queue.Queue(maxsize=LOAD_QUEUE_SIZE)
+        abort = threading.Event()
+        parse_errors = 0
+        read_failed = False
+
+        def too_many_errors():
+            return parse_errors >= self.max_errors
+
+        def read_chunks(f, line_number, thresholds):
+            # Whole-line chunks are parsed in worker processes. Results are
+            # merged in submission order, so handed-off offsets and line
+            # numbers stay monotonic for checkpoints.
+            nonlocal parse_errors, read_failed
+            current_batches = self._new_batches()
+            pending = collections.deque()
+            eof = False
+            try:
+                while True:
+                    while not eof and len(pending) < PARSE_WORKERS * 2:
+                        chunk = b''.join(f.readlines(PARSE_CHUNK_BYTES))
+                        if chunk:
+                            pending.append((self._parse_pool.submit(_process_chunk, entity_type, chunk), f.tell()))
+                        else:
+                            eof = True
+                    if not pending or abort.is_set():
+                        break
+                    future, offset = pending.popleft()
+                    batches, line_count, errors = future.result()
+                    for index, message in errors:
+                        parse_errors += 1
+                        logging.error(f"Error processing line {line_number + index + 1} in {file_path}: {message}")
+                    line_number += line_count
+                    if errors and too_many_errors():
+                        logging.error(f"Too many errors ({parse_errors}). Stopping processing.")
+                        read_failed = True
+                        break
+
+                    for key, records in batches.items():
+                        if records:
+                            current_batches[key].extend(records)
+                    # Hand off batches when they reach the batch size
+                    for key, size in thresholds:
+                        if len(current_batches[key]) >= size:
+                            ready.put((current_batches, False, offset, line_number))
+                            current_batches = self._new_batches()
+                            break
+            finally:
+                for future, _ in pending:
+                    future.cancel()
+            return current_batches
+
+        def read():
+            nonlocal parse_errors, read_failed
+            try:
+                # Specialize the loop to the entity once: bind hot callables
+                # to locals and only watch thresholds of groups it fills
+                loads = orjson.loads
+                collect = self._collect_batches
+                used_keys = {batch_key for batch_key, _ in ENTITY_BATCHES.get(entity_type, ())}
+                thresholds = tuple((key, size) for key, size in self.batch_sizes.items() if key in used_keys)
+                current_batches = self._new_batches()
+                # Lines stay bytes: orjson parses UTF-8 directly, skipping
+                # the text decode pass
+                with self.open_shard(file_path) as f:
+                    start_line = 0
+                    if checkpoint:
+                        f.seek(checkpoint['offset'])
+                        start_line = checkpoint['line_number']
+                        logging.info(f"Resuming {file_path} at line {start_line + 1}")
+                    if self._parse_pool is not None:
+                        current_batches = read_chunks(f, start_line, thresholds)
+                        if abort.is_set() or read_failed:
+                            return
+                    else:
+                        for line_number, line in enumerate(f, start_line + 1):
+                            if abort.is_set():
+                                return
+                            try:
+                                processed_data = processor(loads(line))
+
+                                if processed_data:
+                                    collect(entity_type, processed_data, current_batches)
+
+                                    # Hand off batches when they reach the batch size
+                                    for key, size in thresholds:
+                                        if len(current_batches[key]) >= size:
+                                            ready.put((current_batches, False, f.tell(), line_number))
+                                            current_batches = self._new_batches()
+                                            break
+
+                            except orjson.JSONDecodeError as e:
+                                parse_errors += 1
+                                logging.error(f"JSON decode error in {file_path} at line {line_number}: {str(e)}")
+                            except Exception as e:
+                                parse_errors += 1
+                                logging.error(f"Error processing line {line_number} in {file_path}: {str(e)}")
+                                logging.error(traceback.format_exc())
+                            else:
+                                continue
+                            if too_many_errors():
+                                logging.error(f"Too many errors ({parse_errors}). Stopping processing.")
+                                read_failed = True
+                                return
 
                 # Load any remaining records
                 if any(current_batches.values()):
-                    if not self.load_batches(entity_type, current_batches):
-                        logging.error("Error loading final batch")
-                        return False
-                    records_processed += len(current_batches['main'])
+                    ready.put((current_batches, True, None, None))
+            except Exception as e:
+                logging.error(f"Error processing file {file_path}: {str(e)}")
+                logging.error(traceback.format_exc())
+                read_failed = True
+            finally:
+                ready.put(None)  # End of file
 
-            logging.info(f"Completed processing {file_path}. Total records: {records_processed}, Errors: {errors}")
-            return errors < self.max_errors
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
 
-        except Exception as e:
-            logging.error(f"Error processing file {file_path}: {str(e)}")
-            logging.error(traceback.format_exc())
+        records_processed = 0
+        failed = False
+        last_progress_log = time.monotonic()
+        while True:
+            item = ready.get()
+            if item is None:
+                break
+            if failed:
+                # Aborting: drain so the reader is never blocked on put
+                continue
+
+            batches, final, offset, line_number = item
+            if self.load_batches(entity_type, batches):
+                if checkpoint_name and not final:
+                    self.state_manager.checkpoint(entity_type, checkpoint_name, offset, line_number)
+            else:
+                # A batch that did not fully load (e.g. main committed but a
+                # child group failed) cannot be skipped: stop, and leave the
+                # checkpoint at the last complete batch so a retry reloads it
+                logging.error(f"Error loading batch from {file_path}. Stopping processing.")
+                failed = True
+
+            records_processed += len(batches['main'])
+            if failed:
+                abort.set()
+            elif not final and time.monotonic() - last_progress_log >= PROGRESS_LOG_INTERVAL:
+                logging.info(f"Processed {records_processed} records from {file_path}")
+                last_progress_log = time.monotonic()
+
+        reader.join()
+        if failed or read_failed:
             return False
 
-    def _collect_batches(self, entity_type: str, processed_data: dict, current_batches: dict):
+        if checkpoint_name:
+            self.state_manager.clear_checkpoint(entity_type, checkpoint_name)
+
+        logging.info(f"Completed processing {file_path}. Total records: {records_processed}, Errors: {parse_errors}")
+        return parse_errors < self.max_errors
+
+    @staticmethod
+    def _new_batches():
+        """
+        Create an empty batch dictionary covering all potential entities.
+
+        :return: Dictionary of batch key to empty record list
+        """
+        return {key: [] for key in BATCH_KEYS}
+
+    @staticmethod
+    def _collect_batches(entity_type: str, processed_data: dict, current_batches: dict):
         """
         Collect batches for different entity types.
 
@@ -152,66 +511,13 @@ class StreamingProcessor(StreamingBase):
         :param current_batches: Dictionary to collect batches
         """
         try:
-            # Mapping for different entity types
-            entity_batch_mapping = {
-                'works': [
-                    ('main', 'works'),
-                    ('ids', 'works_ids'),
-                    ('open_access', 'works_open_access'),
-                    ('authorships', 'works_authorships'),
-                    ('related_works', 'works_related_works'),
-                    ('referenced_works', 'works_referenced_works'),
-                    ('concepts', 'works_concepts'),
-                    ('counts_by_year', 'works_counts_by_year')
-                ],
-                'authors': [
-                    ('main', 'authors'),
-                    ('ids', 'authors_ids'),
-                    ('counts_by_year', 'authors_counts_by_year'),
-                    ('concepts', 'authors_concepts')
-                ],
-                'sources': [
-                    ('main', 'sources'),
-                    ('ids', 'sources_ids'),
-                    ('counts_by_year', 'sources_counts_by_year')
-                ],
-                'institutions': [
-                    ('main', 'institutions'),
-                    ('ids', 'institutions_ids'),
-                    ('geo', 'institutions_geo'),
-                    ('counts_by_year', 'institutions_counts_by_year'),
-                    ('associated_institutions', 'institutions_associated_institutions')
-                ],
-                'domains': [
-                    ('main', 'domains'),
-                    ('counts_by_year', 'domains_counts_by_year')
-                ],
-                'fields': [
-                    ('main', 'fields'),
-                    ('counts_by_year', 'fields_counts_by_year')
-                ],
-                'subfields': [
-                    ('main', 'subfields'),
-                    ('counts_by_year', 'subfields_counts_by_year')
-                ],
-                'topics': [
-                    ('main', 'topics'),
-                    ('counts_by_year', 'topics_counts_by_year')
-                ],
-                'publishers': [
-                    ('main', 'publishers'),
-                    ('ids', 'publishers_ids'),
-                    ('counts_by_year', 'publishers_counts_by_year')
-                ]
-            }
-
             # Collect batches for the specific entity type
-            for batch_key, data_key in entity_batch_mapping.get(entity_type, []):
-                if data_key in processed_data:
-                    if isinstance(processed_data[data_key], list):
-                        current_batches[batch_key].extend(processed_data[data_key])
-                    elif processed_data[data_key]:
-                        current_batches[batch_key].append(processed_data[data_key])
+            for batch_key, data_key in ENTITY_BATCHES.get(entity_type, ()):
+                value = processed_data.get(data_key)
+                if isinstance(value, list):
+                    current_batches[batch_key].extend(value)
+                elif value:
+                    current_batches[batch_key].append(value)
         except Exception as e:
             logging.error(f"Error collecting batches for {entity_type}: {str(e)}")
             logging.error(traceback.format_exc())
@@ -222,133 +528,166 @@ class StreamingProcessor(StreamingBase):
 
         :param entity_type: Type of entity being processed
         :param batches: Dictionary of batches to load
-        :return: True if loading is successful, False otherwise
+        :return: True if every group loaded, False otherwise
         """
-        # Comprehensive table mapping for all entity types
-        table_mapping = {
-            'works': {
-                'main': 'works',
-                'ids': 'works_ids',
-                'open_access': 'works_open_access',
-                'authorships': 'works_authorships',
-                'related_works': 'works_related_works',
-                'referenced_works': 'works_referenced_works',
-                'concepts': 'works_concepts',
-                'counts_by_year': 'works_counts_by_year'
-            },
-            'authors': {
-                'main': 'authors',
-                'ids': 'authors_ids',
-                'counts_by_year': 'authors_counts_by_year',
-                'concepts': 'authors_concepts'
-            },
-            'sources': {
-                'main': 'sources',
-                'ids': 'sources_ids',
-                'counts_by_year': 'sources_counts_by_year'
-            },
-            'institutions': {
-                'main': 'institutions',
-                'ids': 'institutions_ids',
-                'geo': 'institutions_geo',
-                'counts_by_year': 'institutions_counts_by_year',
-                'associated_institutions': 'institutions_associated_institutions'
-            },
-            'domains': {
-                'main': 'domains',
-                'counts_by_year': 'domains_counts_by_year'
-            },
-            'fields': {
-                'main': 'fields',
-                'counts_by_year': 'fields_counts_by_year'
-            },
-            'subfields': {
-                'main': 'subfields',
-                'counts_by_year': 'subfields_counts_by_year'
-            },
-            'topics': {
-                'main': 'topics',
-                'counts_by_year': 'topics_counts_by_year'
-            },
-            'publishers': {
-                'main': 'publishers',
-                'ids': 'publishers_ids',
-                'counts_by_year': 'publishers_counts_by_year'
-            }
-        }
-
         # Ensure the entity type is supported
-        if entity_type not in table_mapping:
+        if entity_type not in ENTITY_BATCHES:
             logging.error(f"Unsupported entity type: {entity_type}")
             return False
 
         try:
             # Ensure connection is alive
             self.connect()
-            
-            with self.conn.cursor() as cur:
-                # Process each batch type for the specific entity
-                for batch_key, table_suffix in table_mapping[entity_type].items():
-                    if batches.get(batch_key):
-                        # Prepare columns and values
-                        columns = list(batches[batch_key][0].keys())
-                        table = f"openalex.{table_suffix}"
-                        values = [[record.get(col) for col in columns] for record in batches[batch_key]]
-                        
-                        # Construct upsert query based on batch type
-                        if batch_key == 'main':
-                            # Primary entity table uses id as conflict target
-                            query = f"""
-                                INSERT INTO {table} ({','.join(columns)})
-                                VALUES %s
-                                ON CONFLICT (id) DO UPDATE
-                                SET {','.join(f"{col}=EXCLUDED.{col}" for col in columns if col != 'id')}
-                            """
-                        elif batch_key in ['ids', 'geo']:
-                            # ID and geo tables use specific ID column
-                            id_col = f"{entity_type[:-1]}_id"
-                            query = f"""
-                                INSERT INTO {table} ({','.join(columns)})
-                                VALUES %s
-                                ON CONFLICT ({id_col}) DO UPDATE
-                                SET {','.join(f"{col}=EXCLUDED.{col}" for col in columns if col != id_col)}
-                            """
-                        elif batch_key in ['counts_by_year', 'authorships', 'related_works', 'referenced_works', 'concepts', 'associated_institutions']:
-                            # These tables use composite primary keys
-                            pk_columns = [col for col in columns if col not in ['works_count', 'cited_by_count', 'score', 'author_position', 'primary_author', 'relationship']]
-                            query = f"""
-                                INSERT INTO {table} ({','.join(columns)})
-                                VALUES %s
-                                ON CONFLICT ({','.join(pk_columns)}) DO UPDATE
-                                SET {','.join(f"{col}=EXCLUDED.{col}" for col in columns if col not in pk_columns)}
-                            """
-                        else:
-                            # Default - insert with no conflict handling
-                            query = f"""
-                                INSERT INTO {table} ({','.join(columns)})
-                                VALUES %s
-                                ON CONFLICT DO NOTHING
-                            """
-                        
-                        # Execute batch insert
-                        execute_values(cur, query, values)
-
-            # Commit the transaction
-            self.conn.commit()
-            return True
-        
+
+            groups = ENTITY_BATCHES[entity_type]
+
+            # Child tables reference the main rows through foreign keys, so
+            # main is loaded and committed first; its children are skipped
+            # if it fails rather than committed as orphans
+            if batches.get('main'):
+                try:
+                    self._load_group(entity_type, 'main', dict(groups)['main'], batches['main'])
+                except Exception as e:
+                    logging.error(f"Database error loading main batch for {entity_type}: {str(e)}")
+                    logging.error(traceback.format_exc())
+                    return False
+
+            # Each child group then loads in its own transaction on its own
+            # connection. Groups target different tables, so they never
+            # contend on rows. Any failed group fails the whole batch; the
+            # caller then retries it from the last checkpoint, and the
+            # upserts make reloading the committed groups harmless.
+            futures = {
+                self._executor.submit(self._load_group, entity_type, batch_key, table_suffix, batches[batch_key]): batch_key
+                for batch_key, table_suffix in groups
+                if batch_key != 'main' and batches.get(batch_key)
+            }
+            success = True
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Database error loading {futures[future]} batch for {entity_type}: {str(e)}")
+                    logging.error(traceback.format_exc())
+                    success = False
+            return success
+
         except Exception as e:
-            # Rollback in case of error
-            self.conn.rollback()
             logging.error(f"Database error loading batch for {entity_type}: {str(e)}")
             logging.error(traceback.format_exc())
             return False
 
+    def _load_group(self, entity_type: str, batch_key: str, table_suffix: str, records: list):
+        """
+        Load one batch group on a pooled connection and commit it.
+
+        :param entity_type: Type of entity being processed
+        :param batch_key: Batch group the records belong to
+        :param table_suffix: Target table within the openalex schema
+        :param records: Records of the group
+        """
+        # Prepare columns and the COPY payload. Flat records arrive as
+        # NamedTuples that already are rows; child records are fixed-shape
+        # dicts, so itemgetter pulls every column in C. Lines are encoded
+        # lazily as COPY reads them, so no second copy of the batch is held.
+        first = records[0]
+        if isinstance(first, tuple):
+            columns = first._fields
+            rows = records
+        else:
+            columns = tuple(first.keys())
+            getter = operator.itemgetter(*columns)
+            rows = map(getter, records) if len(columns) > 1 else ((getter(r),) for r in records)
+        create_sql, copy_sql, upsert_sql = self._group_statements(entity_type, batch_key, table_suffix, columns)
+        buf = _CopyStream('\t'.join(map(_copy_text, row)) + '\n' for row in rows)
+
+        conn = self.get_connection()
+        try:
+            # Commits on success, rolls back on error
+            with conn, conn.cursor() as cur:
+                # COPY skips per-row parsing and planning; the staging table
+                # lets the upsert run as one statement
+                cur.execute(create_sql)
+                cur.copy_expert(copy_sql, buf, size=COPY_CHUNK_SIZE)
+                cur.execute(upsert_sql)
+        finally:
+            self.release_connection(conn)
+
+    def _group_statements(self, entity_type: str, batch_key: str, table_suffix: str, columns: tuple) -> tuple:
+        """
+        Get the staging, COPY and upsert statements for a batch group.
+
+        :param entity_type: Type of entity being processed
+        :param batch_key: Batch group the records belong to
+        :param table_suffix: Target table within the openalex schema
+        :param columns: Column names present in the batch
+        :return: Tuple of (create staging SQL, COPY SQL, upsert SQL)
+        """
+        cache_key = (entity_type, batch_key, columns)
+        statements = self._sql_cache.get(cache_key)
+        if statements is None:
+            table = f"openalex.{table_suffix}"
+            staging = f"stg_{table_suffix}"
+            statements = self._sql_cache[cache_key] = (
+                f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP",
+                f"COPY {staging} ({','.join(columns)}) FROM STDIN",
+                self._upsert_query(entity_type, batch_key, table, staging, columns)
+            )
+        return statements
+
+    @staticmethod
+    def _upsert_query(entity_type: str, batch_key: str, table: str, staging: str, columns: tuple) -> str:
+        """
+        Build the statement moving a staged batch into its target table.
+
+        :param entity_type: Type of entity being processed
+        :param batch_key: Batch group the rows belong to
+        :param table: Qualified target table
+        :param staging: Staging table holding the copied rows
+        :param columns: Column names present in the batch
+        :return: INSERT ... SELECT statement with conflict handling
+        """
+        # Construct upsert query based on batch type
+        if batch_key == 'main':
+            # Primary entity table uses id as conflict target
+            conflict_columns = ['id']
+        elif batch_key in ['ids', 'geo']:
+            # ID and geo tables use specific ID column
+            conflict_columns = [f"{entity_type[:-1]}_id"]
+        elif batch_key in ['counts_by_year', 'authorships', 'related_works', 'referenced_works', 'concepts', 'associated_institutions']:
+            # These tables use composite primary keys
+            conflict_columns = [col for col in columns if col not in ['works_count', 'cited_by_count', 'score', 'author_position', 'primary_author', 'relationship']]
+        else:
+            conflict_columns = None
+
+        column_list = ','.join(columns)
+        update_columns = [col for col in columns if col not in (conflict_columns or ())]
+        if not conflict_columns or not update_columns:
+            # Default - insert with no conflict handling
+            return f"""
+                INSERT INTO {table} ({column_list})
+                SELECT {column_list} FROM {staging}
+                ON CONFLICT DO NOTHING
+            """
+
+        # One statement may not update a row twice, so keep a single staged
+        # row per conflict key
+        conflict_list = ','.join(conflict_columns)
+        return f"""
+            INSERT INTO {table} ({column_list})
+            SELECT DISTINCT ON ({conflict_list}) {column_list} FROM {staging}
+            ON CONFLICT ({conflict_list}) DO UPDATE
+            SET {','.join(f"{col}=EXCLUDED.{col}" for col in update_columns)}
+        """
+
     def close(self):
-        """Close the database connection."""
-        if self.conn:
+        """Close the loader threads and all pooled database connections."""
+        self._executor.shutdown(wait=True)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=True)
+        if self._pool and not self._pool.closed:
             try:
-                self.conn.close()
+                self._pool.closeall()
                 logging.info("Database connection closed")
             except Exception as e:
                 logging.error(f"Error closing database connection: {str(e)}")
@@ -0,0 +1,97 @@
+# scripts/etl/utils/concurrency.py
+import time
+import logging
+import threading
+
+class AdaptiveConcurrencyController:
+    def __init__(self, initial=4, minimum=1, maximum=32, window=10.0, increase_threshold=0.05):
+        """
+        Limit concurrent work and tune the limit from observed throughput.
+
+        Throughput is measured over fixed windows. The limit grows by one while
+        each increase still improves throughput by more than the threshold,
+        shrinks by one when throughput drops, and is halved when retries were
+        seen in the window (additive increase / multiplicative decrease).
+
+        :param initial: Starting concurrency limit
+        :param minimum: Lowest allowed limit
+        :param maximum: Highest allowed limit
+        :param window: Measurement window in seconds
+        :param increase_threshold: Relative gain required to keep increasing
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.window = window
+        self.increase_threshold = increase_threshold
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._window_retries = 0
+        self._last_throughput = None
+
+    def acquire(self):
+        """Block until a slot is available under the current limit."""
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self):
+        """Return a slot taken with acquire()."""
+        with self._cond:
+            self._active -= 1
+            self._maybe_adjust()
+            self._cond.notify_all()
+
+    def record_bytes(self, nbytes):
+        """
+        Account transferred bytes (usable as a boto3 transfer callback).
+
+        :param nbytes: Number of bytes transferred since the last call
+        """
+        with self._cond:
+            self._window_bytes += nbytes
+            if self._maybe_adjust():
+                self._cond.notify_all()
+
+    def record_retry(self):
+        """Account a failed attempt that will be retried."""
+        with self._cond:
+            self._window_retries += 1
+
+    def _maybe_adjust(self):
+        """
+        Close the measurement window if it has elapsed and update the limit.
+        Must be called with the condition held.
+
+        :return: True if the limit was changed
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return False
+
+        throughput = self._window_bytes / elapsed
+        previous_limit = self.limit
+
+        if self._window_retries:
+            self.limit = max(self.minimum, self.limit // 2)
+        elif self._last_throughput is None or throughput > self._last_throughput * (1 + self.increase_threshold):
+            self.limit = min(self.maximum, self.limit + 1)
+        elif throughput < self._last_throughput:
+            self.limit = max(self.minimum, self.limit - 1)
+
+        if self.limit != previous_limit:
+            logging.info(
+                "Adjusted download concurrency %d -> %d (%.1f MiB/s, %d retries)",
+                previous_limit, self.limit, throughput / (1024 * 1024), self._window_retries
+            )
+
+        self._last_throughput = throughput
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_retries = 0
+        return self.limit != previous_limit
@@ -1,10 +1,21 @@
 # scripts/etl/utils/entity_processors.py
-import json
+import sys
 import logging
-import traceback
+import orjson
+import collections
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
+# Stand-in for missing or null nested objects
+_EMPTY = {}
+
+# Open Access statuses allowed by the database constraint, mapped to
+# themselves so every record shares one string object per status
+_OA_STATUSES = {status: status for status in ('diamond', 'gold', 'green', 'bronze', 'hybrid', 'closed')}
+
+# JSON text of empty collections, which most list fields are
+_EMPTY_JSON = {list: '[]', dict: '{}'}
+
 class EntityProcessors:
     @staticmethod
     def safe_get(data: Dict[str, Any], key: str, default: Any = None) -> Any:
@@ -16,11 +27,7 @@ class EntityProcessors:
         :param default: Default value if key is not found
         :return: Retrieved value or default
         """
-        try:
-            return data.get(key, default)
-        except Exception as e:
-            logging.error(f"Error getting key {key}: {str(e)}")
-            return default
+        return data.get(key, default) if isinstance(data, dict) else default
             
     @staticmethod
     def safe_json(value: Any, default: Any = None) -> Optional[str]:
@@ -31,8 +38,14 @@ class EntityProcessors:
         :param default: Default value if conversion fails
         :return: JSON string or default
         """
+        if value is None:
+            return default
+        if not value and value.__class__ in _EMPTY_JSON:
+            return _EMPTY_JSON[value.__class__]
         try:
-            return json.dumps(value) if value is not None else default
+            # orjson serializes in C; non-string keys are stringified as
+            # json.dumps does
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
         except Exception as e:
             logging.error(f"Error converting to JSON: {str(e)}")
             return default
@@ -47,21 +60,17 @@ class EntityProcessors:
         """
         if not status:
             return None
-        
-        oa_status_mapping = {
-            'diamond': 'diamond',
-            'gold': 'gold',
-            'green': 'green',
-            'bronze': 'bronze',
-            'hybrid': 'hybrid',
-            'closed': 'closed'
-        }
-        
-        normalized = oa_status_mapping.get(str(status).lower())
+        # OpenAlex already emits canonical lowercase statuses
+        if status.__class__ is str:
+            normalized = _OA_STATUSES.get(status)
+            if normalized:
+                return normalized
+
+        normalized = _OA_STATUSES.get(str(status).lower())
         if not normalized:
             logging.warning(f"Unrecognized OA status: {status}. Using 'closed' as default.")
             normalized = 'closed'
-        
+
         return normalized
 
     @classmethod
@@ -70,169 +79,39 @@ class EntityProcessors:
         Process a work entity with comprehensive field extraction.
         """
         try:
-            # Process primary work details
-            work_data = {
-                'id': data.get('id'),
-                'doi': data.get('doi'),
-                'doi_registration_agency': data.get('doi_registration_agency'),
-                'title': data.get('title'),
-                'display_name': data.get('display_name'),
-                'publication_year': data.get('publication_year'),
-                'publication_date': data.get('publication_date'),
-                'type': data.get('type'),
-                'type_crossref': data.get('type_crossref'),
-                'type_id': data.get('type_id'),
-                'language': data.get('language'),
-                'language_id': data.get('language_id'),
-                'cited_by_count': data.get('cited_by_count', 0),
-                'cited_by_api_url': data.get('cited_by_api_url'),
-                'is_retracted': data.get('is_retracted', False),
-                'is_paratext': data.get('is_paratext', False),
-                'abstract_inverted_index': cls.safe_json(data.get('abstract_inverted_index')),
-                'indexed_in': cls.safe_json(data.get('indexed_in', [])),
-                'has_fulltext': data.get('has_fulltext', False),
-                'authors_count': len(data.get('authorships', [])),
-                'concepts_count': len(data.get('concepts', [])),
-                'topics_count': len(data.get('topics', [])),
-                'referenced_works_count': len(data.get('referenced_works', [])),
-                'referenced_works': cls.safe_json(data.get('referenced_works', [])),
-                'related_works': cls.safe_json(data.get('related_works', [])),
-                'primary_location': cls.safe_json(data.get('primary_location')),
-                'best_oa_location': cls.safe_json(data.get('best_oa_location')),
-                'locations_count': data.get('locations_count'),
-                'primary_topic': cls.safe_json(data.get('primary_topic')),
-                'sustainable_development_goals': cls.safe_json(data.get('sustainable_development_goals', [])),
-                'keywords': cls.safe_json(data.get('keywords', [])),
-                'fwci': data.get('fwci'),
-                'citation_normalized_percentile': cls.safe_json(data.get('citation_normalized_percentile')),
-                'grants': cls.safe_json(data.get('grants', [])),
-                'apc_list': data.get('apc_list'),
-                'apc_paid': data.get('apc_paid'),
-                'created_date': data.get('created_date'),
-                'updated_date': data.get('updated_date') or data.get('updated')
-            }
+            # Parent id shared by every child row
+            work_id = data.get('id')
 
-            # Process IDs
-            works_ids = {
-                'work_id': data.get('id'),
-                'openalex': data.get('ids', {}).get('openalex'),
-                'doi': data.get('doi'),
-                'mag': data.get('ids', {}).get('mag'),
-                'pmid': data.get('ids', {}).get('pmid'),
-                'pmcid': data.get('ids', {}).get('pmcid'),
-                'wikidata': data.get('ids', {}).get('wikidata')
-            }
+            # Process primary work details, IDs
+            work_data = _extract_work(data)
+            works_ids = _extract_work_ids(data)
 
             # Process Open Access
-            open_access = data.get('open_access', {})
-            works_open_access = {
-                'work_id': data.get('id'),
-                'is_oa': open_access.get('is_oa', False),
-                'oa_status': cls._normalize_oa_status(open_access.get('oa_status')),
-                'oa_url': open_access.get('oa_url'),
-                'any_repository_has_fulltext': open_access.get('any_repository_has_fulltext', False)
-            }
+            works_open_access = _extract_work_open_access(data)
 
             # Process Locations
-            works_locations = []
-            locations = data.get('locations', [])
+            locations = data.get('locations') or ()
             if not locations and data.get('primary_location'):
                 locations = [data['primary_location']]
-            
-            for location in locations:
-                source = location.get('source', {})
-                works_locations.append({
-                    'work_id': data.get('id'),
-                    'source_id': source.get('id'),
-                    'landing_page_url': location.get('landing_page_url'),
-                    'pdf_url': location.get('pdf_url'),
-                    'is_oa': location.get('is_oa', False),
-                    'version': location.get('version'),
-                    'license': location.get('license'),
-                    'is_accepted': location.get('is_accepted', False),
-                    'is_published': location.get('is_published', False)
-                })
+            works_locations = _extract_work_locations(work_id, locations)
 
             # Process Authorships
-            works_authorships = []
-            for authorship in data.get('authorships', []):
-                author = authorship.get('author', {})
-                institutions = authorship.get('institutions', [])
-                
-                authorship_entry = {
-                    'work_id': data.get('id'),
-                    'author_id': author.get('id'),
-                    'author_position': authorship.get('author_position'),
-                    'raw_author_name': author.get('display_name'),
-                    'raw_affiliation_string': next(iter(authorship.get('raw_affiliation_strings', [])), None),
-                    'institution_id': institutions[0].get('id') if institutions else None,
-                    'is_corresponding': authorship.get('is_corresponding', False),
-                    'countries': cls.safe_json(authorship.get('countries', [])),
-                    'country_ids': cls.safe_json(authorship.get('country_ids', []))
-                }
-                works_authorships.append(authorship_entry)
+            works_authorships = _extract_work_authorships(work_id, data.get('authorships') or ())
 
             # Process Topics
-            works_topics = []
-            for topic in data.get('topics', []):
-                works_topics.append({
-                    'work_id': data.get('id'),
-                    'topic_id': topic.get('id'),
-                    'score': topic.get('score'),
-                    'display_name': topic.get('display_name'),
-                    'field_id': topic.get('field', {}).get('id'),
-                    'field_display_name': topic.get('field', {}).get('display_name'),
-                    'subfield_id': topic.get('subfield', {}).get('id'),
-                    'subfield_display_name': topic.get('subfield', {}).get('display_name'),
-                    'domain_id': topic.get('domain', {}).get('id'),
-                    'domain_display_name': topic.get('domain', {}).get('display_name')
-                })
+            works_topics = _extract_work_topics(work_id, data.get('topics') or ())
 
             # Process Concepts
-            works_concepts = []
-            for concept in data.get('concepts', []):
-                works_concepts.append({
-                    'work_id': data.get('id'),
-                    'concept_id': concept.get('id'),
-                    'score': concept.get('score'),
-                    'display_name': concept.get('display_name'),
-                    'level': concept.get('level'),
-                    'wikidata': concept.get('wikidata')
-                })
+            works_concepts = _extract_work_concepts(work_id, data.get('concepts') or ())
 
             # Process Mesh
-            works_mesh = []
-            for mesh in data.get('mesh', []):
-                works_mesh.append({
-                    'work_id': data.get('id'),
-                    'descriptor_ui': mesh.get('descriptor_ui'),
-                    'descriptor_name': mesh.get('descriptor_name'),
-                    'qualifier_ui': mesh.get('qualifier_ui'),
-                    'qualifier_name': mesh.get('qualifier_name'),
-                    'is_major_topic': mesh.get('is_major_topic', False)
-                })
+            works_mesh = _extract_work_mesh(work_id, data.get('mesh') or ())
 
             # Process Biblio
-            biblio = data.get('biblio', {})
-            if biblio:
-                works_biblio = {
-                    'work_id': data.get('id'),
-                    'volume': biblio.get('volume'),
-                    'issue': biblio.get('issue'),
-                    'first_page': biblio.get('first_page'),
-                    'last_page': biblio.get('last_page')
-                }
-            else:
-                works_biblio = None
+            works_biblio = _extract_work_biblio(data) if data.get('biblio') else None
 
             # Process Counts by Year
-            works_counts_by_year = []
-            for count in data.get('counts_by_year', []):
-                works_counts_by_year.append({
-                    'work_id': data.get('id'),
-                    'year': count.get('year'),
-                    'cited_by_count': count.get('cited_by_count', 0)
-                })
+            works_counts_by_year = _extract_work_counts_by_year(work_id, data.get('counts_by_year') or ())
 
             result = {
                 'works': work_data,
@@ -252,9 +131,12 @@ class EntityProcessors:
             return result
 
         except Exception as e:
-            logging.error(f"Error processing work: {str(e)}")
-            logging.error(f"Problematic data: {json.dumps(data, indent=2)}")
-            logging.error(traceback.format_exc())
+            record = data.get('id') if isinstance(data, dict) else repr(data)[:200]
+            logging.error(f"Error processing work {record}: {str(e)}", exc_info=True)
+            # Full records run to tens of KB; only dump them when debugging
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                dump = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                logging.debug(f"Problematic data: {dump.decode()}")
             return None
 
     @classmethod
@@ -263,53 +145,18 @@ class EntityProcessors:
         Process an author entity with comprehensive field extraction.
         """
         try:
-            # Main author data
-            author_data = {
-                'id': data.get('id'),
-                'orcid': data.get('orcid'),
-                'display_name': data.get('display_name'),
-                'display_name_alternatives': cls.safe_json(data.get('display_name_alternatives', [])),
-                'works_count': data.get('works_count', 0),
-                'cited_by_count': data.get('cited_by_count', 0),
-                'last_known_institution': data.get('last_known_institution', {}).get('id'),
-                'works_api_url': data.get('works_api_url'),
-                'updated_date': data.get('updated_date') or data.get('updated'),
-                'created_date': data.get('created_date')
-            }
+            # Parent id shared by every child row
+            author_id = data.get('id')
 
-            # Author IDs
-            ids = data.get('ids', {})
-            authors_ids = {
-                'author_id': data.get('id'),
-                'openalex': data.get('id'),
-                'orcid': data.get('orcid'),
-                'scopus': ids.get('scopus'),
-                'twitter': ids.get('twitter'),
-                'wikipedia': ids.get('wikipedia'),
-                'mag': ids.get('mag')
-            }
+            # Main author data, author IDs
+            author_data = _extract_author(data)
+            authors_ids = _extract_author_ids(data)
 
             # Counts by Year
-            authors_counts_by_year = []
-            for count in data.get('counts_by_year', []):
-                authors_counts_by_year.append({
-                    'author_id': data.get('id'),
-                    'year': count.get('year'),
-                    'works_count': count.get('works_count', 0),
-                    'cited_by_count': count.get('cited_by_count', 0)
-                })
+            authors_counts_by_year = _extract_author_counts_by_year(author_id, data.get('counts_by_year') or ())
 
             # Concepts
-            authors_concepts = []
-            for concept in data.get('x_concepts', []):
-                authors_concepts.append({
-                    'author_id': data.get('id'),
-                    'concept_id': concept.get('id'),
-                    'score': concept.get('score'),
-                    'display_name': concept.get('display_name'),
-                    'level': concept.get('level'),
-                    'wikidata': concept.get('wikidata')
-                })
+            authors_concepts = _extract_author_concepts(author_id, data.get('x_concepts') or ())
 
             return {
                 'authors': author_data,
@@ -319,8 +166,7 @@ class EntityProcessors:
             }
 
         except Exception as e:
-            logging.error(f"Error processing author: {str(e)}")
-            logging.error(traceback.format_exc())
+            logging.error(f"Error processing author: {str(e)}", exc_info=True)
             return None
 
     @classmethod
@@ -329,48 +175,15 @@ class EntityProcessors:
         Process a source (venue) entity with comprehensive field extraction.
         """
         try:
-            # Main source data
-            source_data = {
-                'id': data.get('id'),
-                'display_name': data.get('display_name'),
-                'host_organization': data.get('host_organization'),
-                'host_organization_name': data.get('host_organization_name'),
-                'host_organization_lineage': cls.safe_json(data.get('host_organization_lineage', [])),
-                'publisher': data.get('publisher'),
-                'issn_l': data.get('issn_l'),
-                'issn': cls.safe_json(data.get('issn', [])),
-                'works_count': data.get('works_count', 0),
-                'cited_by_count': data.get('cited_by_count', 0),
-                'is_in_doaj': data.get('is_in_doaj', False),
-                'is_oa': data.get('is_oa', False),
-                'homepage_url': data.get('homepage_url'),
-                'works_api_url': data.get('works_api_url'),
-                'type': data.get('type'),
-                'type_id': data.get('type_id'),
-                'updated_date': data.get('updated_date') or data.get('updated')
-            }
+            # Parent id shared by every child row
+            source_id = data.get('id')
 
-            # Sources IDs
-            ids = data.get('ids', {})
-            sources_ids = {
-                'source_id': data.get('id'),
-                'openalex': data.get('id'),
-                'issn_l': data.get('issn_l'),
-                'issn': cls.safe_json(data.get('issn', [])),
-                'mag': ids.get('mag'),
-                'wikidata': ids.get('wikidata'),
-                'fatcat': ids.get('fatcat')
-            }
+            # Main source data, sources IDs
+            source_data = _extract_source(data)
+            sources_ids = _extract_source_ids(data)
 
             # Counts by Year
-            sources_counts_by_year = []
-            for count in data.get('counts_by_year', []):
-                sources_counts_by_year.append({
-                    'source_id': data.get('id'),
-                    'year': count.get('year'),
-                    'works_count': count.get('works_count', 0),
-                    'cited_by_count': count.get('cited_by_count', 0)
-                })
+            sources_counts_by_year = _extract_source_counts_by_year(source_id, data.get('counts_by_year') or ())
 
             return {
                 'sources': source_data,
@@ -379,8 +192,7 @@ class EntityProcessors:
             }
 
         except Exception as e:
-            logging.error(f"Error processing source: {str(e)}")
-            logging.error(traceback.format_exc())
+            logging.error(f"Error processing source: {str(e)}", exc_info=True)
             return None
 
     @classmethod
@@ -389,68 +201,19 @@ class EntityProcessors:
         Process an institution entity with comprehensive field extraction.
         """
         try:
-            # Main institution data
-            institution_data = {
-                'id': data.get('id'),
-                'ror': data.get('ror'),
-                'display_name': data.get('display_name'),
-                'country_code': data.get('country_code'),
-                'type': data.get('type'),
-                'type_id': data.get('type_id'),
-                'homepage_url': data.get('homepage_url'),
-                'image_url': data.get('image_url'),
-                'image_thumbnail_url': data.get('image_thumbnail_url'),
-                'display_name_acronyms': cls.safe_json(data.get('display_name_acronyms', [])),
-                'display_name_alternatives': cls.safe_json(data.get('display_name_alternatives', [])),
-                'works_count': data.get('works_count', 0),
-                'cited_by_count': data.get('cited_by_count', 0),
-                'works_api_url': data.get('works_api_url'),
-                'updated_date': data.get('updated_date') or data.get('updated')
-            }
-
-            # Institution IDs
-            ids = data.get('ids', {})
-            institutions_ids = {
-                'institution_id': data.get('id'),
-                'openalex': data.get('id'),
-                'ror': data.get('ror'),
-                'grid': ids.get('grid'),
-                'wikipedia': ids.get('wikipedia'),
-                'wikidata': ids.get('wikidata'),
-                'mag': ids.get('mag')
-            }
+            # Parent id shared by every child row
+            institution_id = data.get('id')
 
-            # Geographical Information
-            geo = data.get('geo', {})
-            institutions_geo = {
-                'institution_id': data.get('id'),
-                'city': geo.get('city'),
-                'geonames_city_id': geo.get('geonames_city_id'),
-                'region': geo.get('region'),
-                'country_code': geo.get('country_code'),
-                'country': geo.get('country'),
-                'latitude': geo.get('latitude'),
-                'longitude': geo.get('longitude')
-            }
+            # Main institution data, institution IDs, geographical information
+            institution_data = _extract_institution(data)
+            institutions_ids = _extract_institution_ids(data)
+            institutions_geo = _extract_institution_geo(data)
 
             # Associated Institutions
-            institutions_associated = []
-            for assoc in data.get('associated_institutions', []):
-                institutions_associated.append({
-                    'institution_id': data.get('id'),
-                    'associated_institution_id': assoc.get('id'),
-                    'relationship': assoc.get('relationship')
-                })
+            institutions_associated = _extract_institution_associated(institution_id, data.get('associated_institutions') or ())
 
             # Counts by Year
-            institutions_counts_by_year = []
-            for count in data.get('counts_by_year', []):
-                institutions_counts_by_year.append({
-                    'institution_id': data.get('id'),
-                    'year': count.get('year'),
-                    'works_count': count.get('works_count', 0),
-                    'cited_by_count': count.get('cited_by_count', 0)
-                })
+            institutions_counts_by_year = _extract_institution_counts_by_year(institution_id, data.get('counts_by_year') or ())
 
             return {
                 'institutions': institution_data,
@@ -461,8 +224,7 @@ class EntityProcessors:
             }
 
         except Exception as e:
-            logging.error(f"Error processing institution: {str(e)}")
-            logging.error(traceback.format_exc())
+            logging.error(f"Error processing institution: {str(e)}", exc_info=True)
             return None
 
     @classmethod
@@ -471,42 +233,15 @@ class EntityProcessors:
         Process a publisher entity.
         """
         try:
-            # Main publisher data
-            publisher_data = {
-                'id': data.get('id'),
-                'display_name': data.get('display_name'),
-                'alternate_titles': cls.safe_json(data.get('alternate_titles', [])),
-                'country_codes': cls.safe_json(data.get('country_codes', [])),
-                'hierarchy_level': data.get('hierarchy_level'),
-                'parent_publisher': data.get('parent_publisher'),
-                'works_count': data.get('works_count', 0),
-                'cited_by_count': data.get('cited_by_count', 0),
-                'sources_count': data.get('sources_count', 0),
-                'homepage_url': data.get('homepage_url'),
-                'image_url': data.get('image_url'),
-                'image_thumbnail_url': data.get('image_thumbnail_url'),
-                'works_api_url': data.get('works_api_url'),
-                'updated_date': data.get('updated_date') or data.get('updated')
-            }
+            # Parent id shared by every child row
+            publisher_id = data.get('id')
 
-            # Publisher IDs
-            ids = data.get('ids', {})
-            publishers_ids = {
-                'publisher_id': data.get('id'),
-                'openalex': data.get('id'),
-                'ror': ids.get('ror'),
-                'wikidata': ids.get('wikidata')
-            }
+            # Main publisher data, publisher IDs
+            publisher_data = _extract_publisher(data)
+            publishers_ids = _extract_publisher_ids(data)
 
             # Counts by Year
-            publishers_counts_by_year = []
-            for count in data.get('counts_by_year', []):
-                publishers_counts_by_year.append({
-                    'publisher_id': data.get('id'),
-                    'year': count.get('year'),
-                    'works_count': count.get('works_count', 0),
-                    'cited_by_count': count.get('cited_by_count', 0)
-                })
+            publishers_counts_by_year = _extract_publisher_counts_by_year(publisher_id, data.get('counts_by_year') or ())
 
             return {
                 'publishers': publisher_data,
@@ -515,8 +250,7 @@ class EntityProcessors:
             }
 
         except Exception as e:
-            logging.error(f"Error processing publisher: {str(e)}")
-            logging.error(traceback.format_exc())
+            logging.error(f"Error processing publisher: {str(e)}", exc_info=True)
             return None
 
     @classmethod
@@ -524,11 +258,477 @@ class EntityProcessors:
         """
         Get the appropriate processor for an entity type.
         """
-        processors = {
-            'works': cls.process_works,
-            'authors': cls.process_authors,
-            'sources': cls.process_sources,
-            'institutions': cls.process_institutions,
-            'publishers': cls.process_publishers
-        }
-        return processors.get(entity_type)
\ No newline at end of file
+        return _PROCESSORS.get(entity_type)
+
+def _field_expressions(schema: tuple, namespace: dict, bind_parents: bool = False) -> List[tuple]:
+    """
+    Compile schema entries into Python expressions over a record named data.
+
+    Each schema entry is (out_key, path[, default[, convert]]). The path is a
+    dotted key path into the raw record, with '|' separating alternatives
+    tried in order; missing or null parents read as empty. The default is
+    used when the leaf key is absent, and convert names an entry of
+    _CONVERTERS applied to the value.
+
+    With bind_parents, a nested object read by several fields is looked up
+    once: its first unconditional use binds it to a local with :=, and later
+    fields read the local. The expressions must then be evaluated in order
+    within one function scope.
+
+    :param schema: Tuple of field entries
+    :param namespace: Globals of the generated code; constants are added here
+    :param bind_parents: Share nested object lookups between expressions
+    :return: List of (out_key, expression source) tuples
+    """
+    namespace.update({'_g': dict.get, '_EMPTY': _EMPTY})
+    # Key path prefix -> local bound to that nested object
+    parents = {}
+    expressions = []
+    for i, entry in enumerate(schema):
+        out_key, path, default, convert = (tuple(entry) + (None, None))[:4]
+        default_arg = ''
+        if default is not None:
+            namespace[f'_d{i}'] = default
+            default_arg = f", _d{i}"
+
+        alternatives = []
+        for n, alternative in enumerate(path.split('|')):
+            keys = alternative.split('.')
+            expr = 'data'
+            for depth, key in enumerate(keys[:-1], 1):
+                prefix = tuple(keys[:depth])
+                if prefix in parents:
+                    expr = parents[prefix]
+                elif bind_parents and n == 0:
+                    # Later alternatives may be skipped by 'or', so only
+                    # the first one binds
+                    local = parents[prefix] = f"_p{len(parents)}"
+                    expr = f"({local} := (_g({expr}, {key!r}) or _EMPTY))"
+                else:
+                    expr = f"(_g({expr}, {key!r}) or _EMPTY)"
+            alternatives.append(f"_g({expr}, {keys[-1]!r}{default_arg})")
+        expr = ' or '.join(alternatives)
+
+        if convert:
+            namespace[f'_c_{convert}'] = _CONVERTERS[convert]
+            expr = f"_c_{convert}({expr})"
+        expressions.append((out_key, expr))
+    return expressions
+
+def _build_extractor(name: str, schema: tuple, record_type):
+    """
+    Generate a function building one flat output record from a raw entity.
+
+    The generated function builds the record tuple in a single expression,
+    so no per-field method lookups or branches run per record, and the
+    result carries no per-instance dict.
+
+    :param name: Name of the generated function
+    :param schema: Tuple of field entries, see _field_expressions
+    :param record_type: NamedTuple class with the schema's fields in order
+    :return: Function mapping a raw record to a record_type instance
+    """
+    namespace = {'_new': tuple.__new__, '_Record': record_type}
+    items = ''.join(
+        f"        {expr},  # {out_key}\n"
+        for out_key, expr in _field_expressions(schema, namespace, bind_parents=True)
+    )
+    source = f"def {name}(data):\n    return _new(_Record, (\n{items}    ))\n"
+    exec(compile(source, f'<{name}>', 'exec'), namespace)
+    return namespace[name]
+
+def _record_type(typename: str, schema: tuple):
+    """
+    Create the NamedTuple class for a schema's output records.
+
+    :param typename: Class name
+    :param schema: Tuple of field entries, see _field_expressions
+    :return: NamedTuple class
+    """
+    return collections.namedtuple(typename, [entry[0] for entry in schema])
+
+def _build_row_builder(name: str, schema: tuple, record_type):
+    """
+    Generate a function building the child rows of a nested list.
+
+    Each row is a record_type tuple holding the parent id followed by the
+    schema's fields, resolved against the list item as data. Tuple rows
+    carry no per-row hash table, which keeps wide child batches compact.
+
+    :param name: Name of the generated function
+    :param schema: Tuple of field entries, see _field_expressions
+    :param record_type: NamedTuple class with the parent key and then the
+        schema's fields in order, see _row_type
+    :return: Function mapping (parent id, list items) to a list of rows
+    """
+    namespace = {'_new': tuple.__new__, '_Record': record_type}
+    items = ''.join(
+        f"            {expr},  # {out_key}\n"
+        for out_key, expr in _field_expressions(schema, namespace, bind_parents=True)
+    )
+    # A plain loop rather than a comprehension keeps the := parent locals
+    # fast locals instead of closure cells
+    source = (
+        f"def {name}(parent_id, items):\n"
+        f"    rows = []\n"
+        f"    append = rows.append\n"
+        f"    for data in items:\n"
+        f"        append(_new(_Record, (\n"
+        f"            parent_id,\n"
+        f"{items}"
+        f"        )))\n"
+        f"    return rows\n"
+    )
+    exec(compile(source, f'<{name}>', 'exec'), namespace)
+    return namespace[name]
+
+def _row_type(typename: str, parent_key: str, schema: tuple):
+    """
+    Create the NamedTuple class for a child row schema.
+
+    :param typename: Class name
+    :param parent_key: Field name of the parent entity id
+    :param schema: Tuple of field entries, see _field_expressions
+    :return: NamedTuple class
+    """
+    return collections.namedtuple(typename, [parent_key] + [entry[0] for entry in schema])
+
+def _count(value) -> int:
+    """Length of a list field, treating null as empty."""
+    return len(value) if value else 0
+
+def _intern(value, _intern_str=sys.intern):
+    """
+    Intern a categorical string so repeats share one object.
+
+    :param value: Field value
+    :return: Interned string, or the value itself if it is not a string
+    """
+    return _intern_str(value) if value.__class__ is str else value
+
+def _first(value):
+    """First item of a list field, or None if it is null or empty."""
+    return value[0] if value else None
+
+def _first_id(value):
+    """Id of the first object in a list field, or None if there is none."""
+    return (value[0] or _EMPTY).get('id') if value else None
+
+_CONVERTERS = {
+    'json': EntityProcessors.safe_json,
+    'count': _count,
+    'oa_status': EntityProcessors._normalize_oa_status,
+    'intern': _intern,
+    'first': _first,
+    'first_id': _first_id,
+}
+
+_WORK_SCHEMA = (
+    ('id', 'id'),
+    ('doi', 'doi'),
+    ('doi_registration_agency', 'doi_registration_agency', None, 'intern'),
+    ('title', 'title'),
+    ('display_name', 'display_name'),
+    ('publication_year', 'publication_year'),
+    ('publication_date', 'publication_date', None, 'intern'),
+    ('type', 'type', None, 'intern'),
+    ('type_crossref', 'type_crossref', None, 'intern'),
+    ('type_id', 'type_id', None, 'intern'),
+    ('language', 'language', None, 'intern'),
+    ('language_id', 'language_id', None, 'intern'),
+    ('cited_by_count', 'cited_by_count', 0),
+    ('cited_by_api_url', 'cited_by_api_url'),
+    ('is_retracted', 'is_retracted', False),
+    ('is_paratext', 'is_paratext', False),
+    ('abstract_inverted_index', 'abstract_inverted_index', None, 'json'),
+    ('indexed_in', 'indexed_in', [], 'json'),
+    ('has_fulltext', 'has_fulltext', False),
+    ('authors_count', 'authorships', None, 'count'),
+    ('concepts_count', 'concepts', None, 'count'),
+    ('topics_count', 'topics', None, 'count'),
+    ('referenced_works_count', 'referenced_works', None, 'count'),
+    ('referenced_works', 'referenced_works', [], 'json'),
+    ('related_works', 'related_works', [], 'json'),
+    ('primary_location', 'primary_location', None, 'json'),
+    ('best_oa_location', 'best_oa_location', None, 'json'),
+    ('locations_count', 'locations_count'),
+    ('primary_topic', 'primary_topic', None, 'json'),
+    ('sustainable_development_goals', 'sustainable_development_goals', [], 'json'),
+    ('keywords', 'keywords', [], 'json'),
+    ('fwci', 'fwci'),
+    ('citation_normalized_percentile', 'citation_normalized_percentile', None, 'json'),
+    ('grants', 'grants', [], 'json'),
+    ('apc_list', 'apc_list'),
+    ('apc_paid', 'apc_paid'),
+    ('created_date', 'created_date'),
+    ('updated_date', 'updated_date|updated'),
+)
+Work = _record_type('Work', _WORK_SCHEMA)
+_extract_work = _build_extractor('extract_work', _WORK_SCHEMA, Work)
+
+_WORK_IDS_SCHEMA = (
+    ('work_id', 'id'),
+    ('openalex', 'ids.openalex'),
+    ('doi', 'doi'),
+    ('mag', 'ids.mag'),
+    ('pmid', 'ids.pmid'),
+    ('pmcid', 'ids.pmcid'),
+    ('wikidata', 'ids.wikidata'),
+)
+WorkIds = _record_type('WorkIds', _WORK_IDS_SCHEMA)
+_extract_work_ids = _build_extractor('extract_work_ids', _WORK_IDS_SCHEMA, WorkIds)
+
+_WORK_OPEN_ACCESS_SCHEMA = (
+    ('work_id', 'id'),
+    ('is_oa', 'open_access.is_oa', False),
+    ('oa_status', 'open_access.oa_status', None, 'oa_status'),
+    ('oa_url', 'open_access.oa_url'),
+    ('any_repository_has_fulltext', 'open_access.any_repository_has_fulltext', False),
+)
+WorkOpenAccess = _record_type('WorkOpenAccess', _WORK_OPEN_ACCESS_SCHEMA)
+_extract_work_open_access = _build_extractor('extract_work_open_access', _WORK_OPEN_ACCESS_SCHEMA, WorkOpenAccess)
+
+# Child rows shared in shape across entities
+_CONCEPT_SCHEMA = (
+    ('concept_id', 'id'),
+    ('score', 'score'),
+    ('display_name', 'display_name'),
+    ('level', 'level'),
+    ('wikidata', 'wikidata'),
+)
+
+_COUNTS_BY_YEAR_SCHEMA = (
+    ('year', 'year'),
+    ('works_count', 'works_count', 0),
+    ('cited_by_count', 'cited_by_count', 0),
+)
+
+_WORK_MESH_SCHEMA = (
+    ('descriptor_ui', 'descriptor_ui'),
+    ('descriptor_name', 'descriptor_name'),
+    ('qualifier_ui', 'qualifier_ui'),
+    ('qualifier_name', 'qualifier_name'),
+    ('is_major_topic', 'is_major_topic', False),
+)
+
+_WORK_COUNTS_BY_YEAR_SCHEMA = (
+    ('year', 'year'),
+    ('cited_by_count', 'cited_by_count', 0),
+)
+
+_WORK_BIBLIO_SCHEMA = (
+    ('work_id', 'id'),
+    ('volume', 'biblio.volume'),
+    ('issue', 'biblio.issue'),
+    ('first_page', 'biblio.first_page'),
+    ('last_page', 'biblio.last_page'),
+)
+WorkBiblio = _record_type('WorkBiblio', _WORK_BIBLIO_SCHEMA)
+_extract_work_biblio = _build_extractor('extract_work_biblio', _WORK_BIBLIO_SCHEMA, WorkBiblio)
+
+_WORK_LOCATION_SCHEMA = (
+    ('source_id', 'source.id'),
+    ('landing_page_url', 'landing_page_url'),
+    ('pdf_url', 'pdf_url'),
+    ('is_oa', 'is_oa', False),
+    ('version', 'version', None, 'intern'),
+    ('license', 'license', None, 'intern'),
+    ('is_accepted', 'is_accepted', False),
+    ('is_published', 'is_published', False),
+)
+
+_WORK_AUTHORSHIP_SCHEMA = (
+    ('author_id', 'author.id'),
+    ('author_position', 'author_position'),
+    ('raw_author_name', 'author.display_name'),
+    ('raw_affiliation_string', 'raw_affiliation_strings', None, 'first'),
+    ('institution_id', 'institutions', None, 'first_id'),
+    ('is_corresponding', 'is_corresponding', False),
+    ('countries', 'countries', [], 'json'),
+    ('country_ids', 'country_ids', [], 'json'),
+)
+
+_WORK_TOPIC_SCHEMA = (
+    ('topic_id', 'id'),
+    ('score', 'score'),
+    ('display_name', 'display_name'),
+    ('field_id', 'field.id'),
+    ('field_display_name', 'field.display_name'),
+    ('subfield_id', 'subfield.id'),
+    ('subfield_display_name', 'subfield.display_name'),
+    ('domain_id', 'domain.id'),
+    ('domain_display_name', 'domain.display_name'),
+)
+
+WorkLocation = _row_type('WorkLocation', 'work_id', _WORK_LOCATION_SCHEMA)
+_extract_work_locations = _build_row_builder('extract_work_locations', _WORK_LOCATION_SCHEMA, WorkLocation)
+WorkAuthorship = _row_type('WorkAuthorship', 'work_id', _WORK_AUTHORSHIP_SCHEMA)
+_extract_work_authorships = _build_row_builder('extract_work_authorships', _WORK_AUTHORSHIP_SCHEMA, WorkAuthorship)
+WorkTopic = _row_type('WorkTopic', 'work_id', _WORK_TOPIC_SCHEMA)
+_extract_work_topics = _build_row_builder('extract_work_topics', _WORK_TOPIC_SCHEMA, WorkTopic)
+WorkConcept = _row_type('WorkConcept', 'work_id', _CONCEPT_SCHEMA)
+_extract_work_concepts = _build_row_builder('extract_work_concepts', _CONCEPT_SCHEMA, WorkConcept)
+WorkMesh = _row_type('WorkMesh', 'work_id', _WORK_MESH_SCHEMA)
+_extract_work_mesh = _build_row_builder('extract_work_mesh', _WORK_MESH_SCHEMA, WorkMesh)
+WorkCountsByYear = _row_type('WorkCountsByYear', 'work_id', _WORK_COUNTS_BY_YEAR_SCHEMA)
+_extract_work_counts_by_year = _build_row_builder('extract_work_counts_by_year', _WORK_COUNTS_BY_YEAR_SCHEMA, WorkCountsByYear)
+
+_AUTHOR_SCHEMA = (
+    ('id', 'id'),
+    ('orcid', 'orcid'),
+    ('display_name', 'display_name'),
+    ('display_name_alternatives', 'display_name_alternatives', [], 'json'),
+    ('works_count', 'works_count', 0),
+    ('cited_by_count', 'cited_by_count', 0),
+    ('last_known_institution', 'last_known_institution.id'),
+    ('works_api_url', 'works_api_url'),
+    ('updated_date', 'updated_date|updated'),
+    ('created_date', 'created_date'),
+)
+Author = _record_type('Author', _AUTHOR_SCHEMA)
+_extract_author = _build_extractor('extract_author', _AUTHOR_SCHEMA, Author)
+
+_AUTHOR_IDS_SCHEMA = (
+    ('author_id', 'id'),
+    ('openalex', 'id'),
+    ('orcid', 'orcid'),
+    ('scopus', 'ids.scopus'),
+    ('twitter', 'ids.twitter'),
+    ('wikipedia', 'ids.wikipedia'),
+    ('mag', 'ids.mag'),
+)
+AuthorIds = _record_type('AuthorIds', _AUTHOR_IDS_SCHEMA)
+_extract_author_ids = _build_extractor('extract_author_ids', _AUTHOR_IDS_SCHEMA, AuthorIds)
+AuthorCountsByYear = _row_type('AuthorCountsByYear', 'author_id', _COUNTS_BY_YEAR_SCHEMA)
+_extract_author_counts_by_year = _build_row_builder('extract_author_counts_by_year', _COUNTS_BY_YEAR_SCHEMA, AuthorCountsByYear)
+AuthorConcept = _row_type('AuthorConcept', 'author_id', _CONCEPT_SCHEMA)
+_extract_author_concepts = _build_row_builder('extract_author_concepts', _CONCEPT_SCHEMA, AuthorConcept)
+
+_SOURCE_SCHEMA = (
+    ('id', 'id'),
+    ('display_name', 'display_name'),
+    ('host_organization', 'host_organization'),
+    ('host_organization_name', 'host_organization_name'),
+    ('host_organization_lineage', 'host_organization_lineage', [], 'json'),
+    ('publisher', 'publisher'),
+    ('issn_l', 'issn_l'),
+    ('issn', 'issn', [], 'json'),
+    ('works_count', 'works_count', 0),
+    ('cited_by_count', 'cited_by_count', 0),
+    ('is_in_doaj', 'is_in_doaj', False),
+    ('is_oa', 'is_oa', False),
+    ('homepage_url', 'homepage_url'),
+    ('works_api_url', 'works_api_url'),
+    ('type', 'type', None, 'intern'),
+    ('type_id', 'type_id', None, 'intern'),
+    ('updated_date', 'updated_date|updated'),
+)
+Source = _record_type('Source', _SOURCE_SCHEMA)
+_extract_source = _build_extractor('extract_source', _SOURCE_SCHEMA, Source)
+
+_SOURCE_IDS_SCHEMA = (
+    ('source_id', 'id'),
+    ('openalex', 'id'),
+    ('issn_l', 'issn_l'),
+    ('issn', 'issn', [], 'json'),
+    ('mag', 'ids.mag'),
+    ('wikidata', 'ids.wikidata'),
+    ('fatcat', 'ids.fatcat'),
+)
+SourceIds = _record_type('SourceIds', _SOURCE_IDS_SCHEMA)
+_extract_source_ids = _build_extractor('extract_source_ids', _SOURCE_IDS_SCHEMA, SourceIds)
+SourceCountsByYear = _row_type('SourceCountsByYear', 'source_id', _COUNTS_BY_YEAR_SCHEMA)
+_extract_source_counts_by_year = _build_row_builder('extract_source_counts_by_year', _COUNTS_BY_YEAR_SCHEMA, SourceCountsByYear)
+
+_INSTITUTION_SCHEMA = (
+    ('id', 'id'),
+    ('ror', 'ror'),
+    ('display_name', 'display_name'),
+    ('country_code', 'country_code', None, 'intern'),
+    ('type', 'type', None, 'intern'),
+    ('type_id', 'type_id', None, 'intern'),
+    ('homepage_url', 'homepage_url'),
+    ('image_url', 'image_url'),
+    ('image_thumbnail_url', 'image_thumbnail_url'),
+    ('display_name_acronyms', 'display_name_acronyms', [], 'json'),
+    ('display_name_alternatives', 'display_name_alternatives', [], 'json'),
+    ('works_count', 'works_count', 0),
+    ('cited_by_count', 'cited_by_count', 0),
+    ('works_api_url', 'works_api_url'),
+    ('updated_date', 'updated_date|updated'),
+)
+Institution = _record_type('Institution', _INSTITUTION_SCHEMA)
+_extract_institution = _build_extractor('extract_institution', _INSTITUTION_SCHEMA, Institution)
+
+_INSTITUTION_IDS_SCHEMA = (
+    ('institution_id', 'id'),
+    ('openalex', 'id'),
+    ('ror', 'ror'),
+    ('grid', 'ids.grid'),
+    ('wikipedia', 'ids.wikipedia'),
+    ('wikidata', 'ids.wikidata'),
+    ('mag', 'ids.mag'),
+)
+InstitutionIds = _record_type('InstitutionIds', _INSTITUTION_IDS_SCHEMA)
+_extract_institution_ids = _build_extractor('extract_institution_ids', _INSTITUTION_IDS_SCHEMA, InstitutionIds)
+
+_INSTITUTION_GEO_SCHEMA = (
+    ('institution_id', 'id'),
+    ('city', 'geo.city'),
+    ('geonames_city_id', 'geo.geonames_city_id'),
+    ('region', 'geo.region'),
+    ('country_code', 'geo.country_code'),
+    ('country', 'geo.country'),
+    ('latitude', 'geo.latitude'),
+    ('longitude', 'geo.longitude'),
+)
+InstitutionGeo = _record_type('InstitutionGeo', _INSTITUTION_GEO_SCHEMA)
+_extract_institution_geo = _build_extractor('extract_institution_geo', _INSTITUTION_GEO_SCHEMA, InstitutionGeo)
+
+_INSTITUTION_ASSOCIATED_SCHEMA = (
+    ('associated_institution_id', 'id'),
+    ('relationship', 'relationship'),
+)
+InstitutionAssociated = _row_type('InstitutionAssociated', 'institution_id', _INSTITUTION_ASSOCIATED_SCHEMA)
+_extract_institution_associated = _build_row_builder('extract_institution_associated', _INSTITUTION_ASSOCIATED_SCHEMA, InstitutionAssociated)
+InstitutionCountsByYear = _row_type('InstitutionCountsByYear', 'institution_id', _COUNTS_BY_YEAR_SCHEMA)
+_extract_institution_counts_by_year = _build_row_builder('extract_institution_counts_by_year', _COUNTS_BY_YEAR_SCHEMA, InstitutionCountsByYear)
+
+_PUBLISHER_SCHEMA = (
+    ('id', 'id'),
+    ('display_name', 'display_name'),
+    ('alternate_titles', 'alternate_titles', [], 'json'),
+    ('country_codes', 'country_codes', [], 'json'),
+    ('hierarchy_level', 'hierarchy_level'),
+    ('parent_publisher', 'parent_publisher'),
+    ('works_count', 'works_count', 0),
+    ('cited_by_count', 'cited_by_count', 0),
+    ('sources_count', 'sources_count', 0),
+    ('homepage_url', 'homepage_url'),
+    ('image_url', 'image_url'),
+    ('image_thumbnail_url', 'image_thumbnail_url'),
+    ('works_api_url', 'works_api_url'),
+    ('updated_date', 'updated_date|updated'),
+)
+Publisher = _record_type('Publisher', _PUBLISHER_SCHEMA)
+_extract_publisher = _build_extractor('extract_publisher', _PUBLISHER_SCHEMA, Publisher)
+
+_PUBLISHER_IDS_SCHEMA = (
+    ('publisher_id', 'id'),
+    ('openalex', 'id'),
+    ('ror', 'ids.ror'),
+    ('wikidata', 'ids.wikidata'),
+)
+PublisherIds = _record_type('PublisherIds', _PUBLISHER_IDS_SCHEMA)
+_extract_publisher_ids = _build_extractor('extract_publisher_ids', _PUBLISHER_IDS_SCHEMA, PublisherIds)
+PublisherCountsByYear = _row_type('PublisherCountsByYear', 'publisher_id', _COUNTS_BY_YEAR_SCHEMA)
+_extract_publisher_counts_by_year = _build_row_builder('extract_publisher_counts_by_year', _COUNTS_BY_YEAR_SCHEMA, PublisherCountsByYear)
+
+# Processor dispatch, bound once rather than on every get_processor call
+_PROCESSORS = {
+    'works': EntityProcessors.process_works,
+    'authors': EntityProcessors.process_authors,
+    'sources': EntityProcessors.process_sources,
+    'institutions': EntityProcessors.process_institutions,
+    'publishers': EntityProcessors.process_publishers
+}
@@ -1,21 +1,73 @@
 # scripts/etl/utils/state_manager.py
 import os
-import json
+import orjson
 import logging
+import time
 import shutil
+import threading
+import functools
+import collections
+import contextlib
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+def _synchronized(method):
+    """Run a StateManager method while holding the instance lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _decode_state(payload: bytes) -> Dict[str, Any]:
+    """
+    Parse a state file, holding each entity's completed files as a set.
+
+    :param payload: Raw state file contents
+    :return: State dictionary
+    """
+    state = orjson.loads(payload)
+    for entity_state in state.get('entities', {}).values():
+        if 'completed_files' in entity_state:
+            entity_state['completed_files'] = set(entity_state['completed_files'])
+    return state
+
+def _encode_default(value):
+    """Serialize completed file sets as sorted lists."""
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
 class StateManager:
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, batch_flush_interval: float = 30.0):
         """
         Initialize StateManager with base directory.
 
-        :param base_dir: Base directory for the ETL process """
+        :param base_dir: Base directory for the ETL process
+        :param batch_flush_interval: Seconds between writes inside batch()
+        """
         self.base_dir = base_dir
+        self.batch_flush_interval = batch_flush_interval
         self.state_dir = os.path.join(base_dir, 'data', 'state')
         self.state_file = os.path.join(self.state_dir, 'ingestion_state.json')
         self.backup_dir = os.path.join(self.state_dir, 'backups')
+        # Mid-file resume points live in their own file so frequent updates
+        # never race with batched writes of the main state
+        self.checkpoint_file = os.path.join(self.state_dir, 'checkpoints.json')
+        self._checkpoints = None
+        # Last state read or written, reused while the file on disk is
+        # unchanged so lookups do not re-parse the whole state file
+        self._state = None
+        self._state_stat = None
+        # Backup paths oldest first, listed from disk on first use
+        self._backup_files = None
+        # Guards read-modify-write cycles when called from download threads
+        self._lock = threading.RLock()
+        # In-memory state while inside batch(); see batch()
+        self._batch_state = None
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._last_flush = 0.0
         self.setup_directories()
 
     def setup_directories(self):
@@ -27,15 +79,32 @@ class StateManager:
         """
         Load current state from file.
 
+        The returned dict is the shared cache: only use it while holding
+        the instance lock, and never hand it out to callers.
+
         :return: State dictionary
         """
-        if not os.path.exists(self.state_file):
+        if self._batch_state is not None:
+            return self._batch_state
+
+        try:
+            stat = os.stat(self.state_file)
+        except FileNotFoundError:
             return self._create_initial_state()
-        
+
+        # Other StateManager instances may write the same file, so the cache
+        # is only trusted while the file's mtime and size are unchanged
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self._state is not None and self._state_stat == stat_key:
+            return self._state
+
         try:
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            with open(self.state_file, 'rb') as f:
+                state = _decode_state(f.read())
+            self._state = state
+            self._state_stat = stat_key
+            return state
+        except (orjson.JSONDecodeError, IOError) as e:
             logging.error(f"Error loading state file: {e}")
             # Try to restore from backup
             return self._restore_from_backup()
@@ -46,15 +115,69 @@ class StateManager:
 
         :param state: State dictionary to save
         """
-        # Create backup before saving
-        self._backup_state(state)
-        
+        if self._batch_state is not None:
+            # Inside batch(): keep changes in memory, flush periodically
+            self._batch_dirty = True
+            if time.monotonic() - self._last_flush >= self.batch_flush_interval:
+                self._flush_batch()
+            return
+
+        # Write to a temporary file and rename it over the state file so a
+        # crash mid-write never leaves a torn state file behind
+        tmp_file = f"{self.state_file}.tmp"
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(state, default=_encode_default, option=orjson.OPT_INDENT_2))
+            # Keep the state being replaced as a backup
+            self._backup_state()
+            os.replace(tmp_file, self.state_file)
+            stat = os.stat(self.state_file)
+            self._state = state
+            self._state_stat = (stat.st_mtime_ns, stat.st_size)
         except IOError as e:
             logging.error(f"Error saving state file: {e}")
 
+    def _flush_batch(self):
+        """Write the in-memory batch state to disk if it has changes."""
+        state = self._batch_state
+        if self._batch_dirty:
+            self._batch_state = None
+            try:
+                self._save_state(state)
+            finally:
+                self._batch_state = state
+            self._batch_dirty = False
+        self._last_flush = time.monotonic()
+
+    @contextlib.contextmanager
+    def batch(self, entity_type: Optional[str] = None):
+        """
+        Buffer state updates in memory and write them out together.
+
+        Updates made inside the block (from any thread) are written at most
+        every batch_flush_interval seconds and once more when the block exits,
+        including on error, so progress is preserved. Blocks may be nested.
+
+        :param entity_type: Entity type being processed (for logging only)
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self._batch_state = self._load_state()
+                self._batch_dirty = False
+                self._last_flush = time.monotonic()
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    try:
+                        self._flush_batch()
+                    finally:
+                        self._batch_state = None
+                    logging.info(f"Flushed batched state{f' for {entity_type}' if entity_type else ''}")
+
     def _create_initial_state(self) -> Dict[str, Any]:
         """
         Create initial state structure.
@@ -83,26 +206,43 @@ class StateManager:
         self._save_state(initial_state)
         return initial_state
 
-    def _backup_state(self, state: Dict[str, Any]):
+    def _backup_state(self):
         """
-        Create a backup of the current state.
+        Keep the current state file as a backup before it is replaced.
 
-        :param state: State dictionary to backup
+        The backup is a hard link to the existing file, so saving never
+        serializes or copies the state a second time.
         """
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if not os.path.exists(self.state_file):
+            return
+
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
         backup_file = os.path.join(self.backup_dir, f'state_backup_{timestamp}.json')
-        
+
         try:
-            with open(backup_file, 'w') as f:
-                json.dump(state, f, indent=2)
-        except IOError as e:
-            logging.error(f"Error creating backup: {e}")
-        
+            os.link(self.state_file, backup_file)
+        except FileExistsError:
+            # Already backed up within this second
+            return
+        except OSError:
+            # Filesystem without hard links
+            try:
+                shutil.copy2(self.state_file, backup_file)
+            except IOError as e:
+                logging.error(f"Error creating backup: {e}")
+                return
+
+        if self._backup_files is None:
+            self._backup_files = collections.deque(
+                os.path.join(self.backup_dir, name) for name in sorted(os.listdir(self.backup_dir))
+            )
+        else:
+            self._backup_files.append(backup_file)
+
         # Keep only last 10 backups
-        backups = sorted(os.listdir(self.backup_dir))
-        if len(backups) > 10:
-            for old_backup in backups[:-10]:
-                os.remove(os.path.join(self.backup_dir, old_backup))
+        while len(self._backup_files) > 10:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._backup_files.popleft())
 
     def _restore_from_backup(self) -> Dict[str, Any]:
         """
@@ -116,8 +256,8 @@ class StateManager:
         
         try:
             latest_backup = os.path.join(self.backup_dir, backups[-1])
-            with open(latest_backup, 'r') as f:
-                state = json.load(f)
+            with open(latest_backup, 'rb') as f:
+                state = _decode_state(f.read())
             
             # Copy backup to main state file
             shutil.copy2(latest_backup, self.state_file)
@@ -126,6 +266,7 @@ class StateManager:
             logging.error(f"Error restoring from backup: {e}")
             return self._create_initial_state()
 
+    @_synchronized
     def save_state(self, entity_type: str, current_file: str, status: str = 'in_progress'):
         """
         Save current processing state for a specific entity type.
@@ -135,6 +276,7 @@ class StateManager:
         :param status: Current status of processing
         """
         state = self._load_state()
+        now = datetime.now().isoformat()
         
         # Update entity-specific state
         if entity_type not in state['entities']:
@@ -142,15 +284,16 @@ class StateManager:
         
         state['entities'][entity_type].update({
             'current_file': current_file,
-            'last_processed': datetime.now().isoformat(),
+            'last_processed': now,
             'status': status
         })
         
-        state['last_updated'] = datetime.now().isoformat()
+        state['last_updated'] = now
         
         self._save_state(state)
         logging.info(f"Updated state for {entity_type}: {current_file}")
 
+    @_synchronized
     def mark_file_complete(self, entity_type: str, file_path: str):
         """
         Mark a file as completely processed.
@@ -164,13 +307,8 @@ class StateManager:
         if entity_type not in state['entities']:
             state['entities'][entity_type] = {}
         
-        # Initialize completed files list if not exists
-        if 'completed_files' not in state['entities'][entity_type]:
-            state['entities'][entity_type]['completed_files'] = []
-        
-        # Add file to completed list if not already present
-        if file_path not in state['entities'][entity_type]['completed_files']:
-            state['entities'][entity_type]['completed_files'].append(file_path)
+        # Add file to the completed set, initializing it if not exists
+        state['entities'][entity_type].setdefault('completed_files', set()).add(file_path)
         
         # Update total processed count
         count_key = f'{entity_type}_count'
@@ -182,6 +320,7 @@ class StateManager:
         self._save_state(state)
         logging.info(f"Marked file complete: {file_path}")
 
+    @_synchronized
     def mark_entity_complete(self, entity_type: str):
         """
         Mark an entire entity type as completely processed.
@@ -189,6 +328,7 @@ class StateManager:
         :param entity_type: Type of entity to mark complete
         """
         state = self._load_state()
+        now = datetime.now().isoformat()
         
         # Ensure entity exists in state
         if entity_type not in state['entities']:
@@ -197,14 +337,15 @@ class StateManager:
         # Mark entity as complete
         state['entities'][entity_type].update({
             'status': 'completed',
-            'completed_at': datetime.now().isoformat()
+            'completed_at': now
         })
         
-        state['last_updated'] = datetime.now().isoformat()
+        state['last_updated'] = now
         
         self._save_state(state)
         logging.info(f"Marked entity type {entity_type} as complete")
 
+    @_synchronized
     def is_file_processed(self, entity_type: str, file_path: str) -> bool:
         """
         Check if a file has been processed.
@@ -220,9 +361,109 @@ class StateManager:
             return False
         
         # Check completed files
-        completed_files = state['entities'][entity_type].get('completed_files', [])
+        completed_files = state['entities'][entity_type].get('completed_files', ())
         return file_path in completed_files
 
+    @_synchronized
+    def processed_set(self, entity_type: str) -> set:
+        """
+        Get all files marked complete for an entity type.
+
+        Use this instead of calling is_file_processed once per file when
+        filtering a whole listing.
+
+        :param entity_type: Type of entity
+        :return: Set of completed file paths
+        """
+        state = self._load_state()
+        return set(state['entities'].get(entity_type, {}).get('completed_files', ()))
+
+    def _load_checkpoints(self) -> Dict[str, Any]:
+        """
+        Load file checkpoints, reading them from disk on first use.
+
+        :return: Mapping of "entity_type/full_path" to checkpoint
+        """
+        if self._checkpoints is None:
+            try:
+                with open(self.checkpoint_file, 'rb') as f:
+                    self._checkpoints = orjson.loads(f.read())
+            except FileNotFoundError:
+                self._checkpoints = {}
+            except (orjson.JSONDecodeError, IOError) as e:
+                logging.error(f"Error loading checkpoint file: {e}")
+                self._checkpoints = {}
+        return self._checkpoints
+
+    def _write_checkpoints(self):
+        """Atomically write file checkpoints to disk."""
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(self._checkpoints))
+            os.replace(tmp_file, self.checkpoint_file)
+        except IOError as e:
+            logging.error(f"Error saving checkpoint file: {e}")
+
+    @_synchronized
+    def checkpoint(self, entity_type: str, file_path: str, offset: int, line_number: int):
+        """
+        Record how far a file has been loaded so processing can resume there.
+
+        :param entity_type: Type of entity
+        :param file_path: Full path of the file (updated_date folder and name)
+        :param offset: Decompressed byte offset of the first unloaded line
+        :param line_number: Number of the last loaded line
+        """
+        self._load_checkpoints()[f"{entity_type}/{file_path}"] = {
+            'offset': offset,
+            'line_number': line_number,
+            'timestamp': datetime.now().isoformat()
+        }
+        self._write_checkpoints()
+
+    @_synchronized
+    def get_checkpoint(self, entity_type: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the resume point of a partially loaded file.
+
+        :param entity_type: Type of entity
+        :param file_path: Full path of the file
+        :return: Checkpoint dictionary or None
+        """
+        return self._load_checkpoints().get(f"{entity_type}/{file_path}")
+
+    @_synchronized
+    def clear_checkpoint(self, entity_type: str, file_path: str):
+        """
+        Drop the resume point of a file once it is fully loaded.
+
+        :param entity_type: Type of entity
+        :param file_path: Full path of the file
+        """
+        if self._load_checkpoints().pop(f"{entity_type}/{file_path}", None) is not None:
+            self._write_checkpoints()
+
+    @_synchronized
+    def prune_checkpoints(self, entity_type: str, folder: str):
+        """
+        Drop the resume points of an entity's files outside its current folder.
+
+        :param entity_type: Type of entity
+        :param folder: Current updated_date folder, e.g. "updated_date=2024-01-01/"
+        """
+        checkpoints = self._load_checkpoints()
+        prefix = f"{entity_type}/"
+        stale = [
+            key for key in checkpoints
+            if key.startswith(prefix) and not key.startswith(prefix + folder)
+        ]
+        for key in stale:
+            del checkpoints[key]
+        if stale:
+            self._write_checkpoints()
+
+    @_synchronized
     def is_entity_completed(self, entity_type: str) -> bool:
         """
         Check if an entire entity type has been completed.
@@ -238,6 +479,7 @@ class StateManager:
         
         return state['entities'][entity_type].get('status') == 'completed'
 
+    @_synchronized
     def log_error(self, entity_type: str, error_message: str):
         """
         Log an error in the state file.
@@ -266,6 +508,7 @@ class StateManager:
         self._save_state(state)
         logging.error(f"Logged error for {entity_type}: {error_message}")
 
+    @_synchronized
     def get_state_summary(self) -> Dict[str, Any]:
         """
         Get a summary of the current state.
@@ -274,9 +517,11 @@ class StateManager:
         """
         state = self._load_state()
         
+        # The state is cached and shared between threads, so hand out a
+        # copy rather than the live dict
         summary = {
             'last_updated': state.get('last_updated'),
-            'total_processed': state.get('total_processed', {}),
+            'total_processed': dict(state.get('total_processed', {})),
             'entities': {}
         }
         
@@ -285,11 +530,12 @@ class StateManager:
             summary['entities'][entity_type] = {
                 'status': entity_state.get('status', 'not_started'),
                 'last_processed_file': entity_state.get('current_file'),
-                'completed_files_count': len(entity_state.get('completed_files', []))
+                'completed_files_count': len(entity_state.get('completed_files', ()))
             }
         
         return summary
 
+    @_synchronized
     def reset_entity(self, entity_type: str):
         """
         Reset the state for a specific entity type.
@@ -318,22 +564,17 @@ class StateManager:
 
         :param days_to_keep: Number of days to keep backup files
         """
-        import datetime as dt
-        
-        backups = os.listdir(self.backup_dir)
-        current_time = dt.datetime.now()
-        
-        for backup in backups:
-            try:
-                # Extract timestamp from backup filename
-                backup_time_str = backup.replace('state_backup_', '').replace('.json', '')
-                backup_time = dt.datetime.strptime(backup_time_str, '%Y%m%d_%H%M%S')
-                
-                # Calculate days since backup
-                days_since_backup = (current_time - backup_time).days
-                
-                # Remove backup if older than specified days
-                if days_since_backup > days_to_keep:
-                    os.remove(os.path.join(self.backup_dir, backup))
-            except Exception as e:
-                logging.error(f"Error cleaning up backup {backup}: {e}")
+        cutoff = time.time() - days_to_keep * 86400
+
+        with self._lock:
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    try:
+                        # Remove backup if last written before the cutoff
+                        if entry.is_file() and entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                    except OSError as e:
+                        logging.error(f"Error cleaning up backup {entry.name}: {e}")
+
+            # Re-list backups for rotation on the next save
+            self._backup_files = None
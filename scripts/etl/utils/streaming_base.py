@@ -1,8 +1,57 @@
 # scripts/etl/utils/streaming_base.py
 import os
+import queue
+import atexit
 import logging
+import logging.handlers
 from datetime import datetime
 
+_queue_listener = None
+
+# Size at which a log file is rotated, and how many rotated files to keep;
+# bounds both disk use and the monitor's scan of the latest log
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 50 * 1024 * 1024))
+LOG_BACKUP_COUNT = 5
+
+def rotating_file_handler(log_file):
+    """
+    Create a size-rotated file handler for an ETL log.
+
+    :param log_file: Path of the log file
+    :return: RotatingFileHandler keeping LOG_BACKUP_COUNT rotated files
+    """
+    return logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+    )
+
+def enable_queue_logging():
+    """
+    Route root-logger records through a queue drained by a listener thread.
+
+    The handlers configured on the root logger are moved behind a
+    QueueListener, so threads that log never block on file or console I/O.
+    Safe to call more than once; the listener is stopped at exit.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        return
+
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    if not handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
 class StreamingBase:
     def __init__(self, base_dir, component_name):
         self.base_dir = base_dir
@@ -14,8 +63,10 @@ class StreamingBase:
         os.makedirs(log_dir, exist_ok=True)
         os.makedirs(self.temp_dir, exist_ok=True)
 
+        log_file = os.path.join(log_dir, f'{component_name}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+
         logging.basicConfig(
-            filename=os.path.join(log_dir, f'{component_name}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+            handlers=[rotating_file_handler(log_file)],
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
@@ -23,8 +74,8 @@ class StreamingBase:
     def cleanup_temp_file(self, file_path):
         """Safely remove temporary file."""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logging.info(f"Cleaned up temporary file: {file_path}")
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logging.error(f"Error cleaning up {file_path}: {str(e)}")
\ No newline at end of file
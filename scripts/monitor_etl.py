@@ -1,14 +1,26 @@
 # scripts/monitor_etl.py
 import os
 import sys
-import json
+import orjson
 import psutil
 import logging
 import argparse
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 import traceback
 from configs.database.db_config import DB_CONFIG
+from scripts.etl.utils.streaming_base import rotating_file_handler
+
+# Bytes read from the end of the latest ETL log when scanning for errors
+LOG_TAIL_BYTES = 64 * 1024
+
+# Script name identifying the ETL process on its command line
+ETL_SCRIPT = 'run_streaming_etl.py'
+
+# Session settings for the monitor's database connection, passed as libpq
+# startup options so a slow stats query cannot stall the monitoring loop
+SESSION_OPTIONS = '-c statement_timeout=30s'
 
 class ETLMonitor:
     def __init__(self, base_dir, db_config=None):
@@ -20,6 +32,15 @@ class ETLMonitor:
         """
         self.base_dir = base_dir
         self.db_config = db_config or DB_CONFIG
+        # Log files per log directory, keyed by the directory's mtime
+        self._latest_logs = {}
+        # ETL process found by the last get_process_info call
+        self._etl_process = None
+        # Database connection kept open across monitor ticks
+        self._db_conn = None
+        # Parsed state file and the (mtime, size) it was read at
+        self._etl_state = None
+        self._etl_state_stat = None
         self.setup_logging()
 
     def setup_logging(self):
@@ -35,7 +56,7 @@ class ETLMonitor:
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(log_file),
+                rotating_file_handler(log_file),
                 logging.StreamHandler()
             ]
         )
@@ -47,16 +68,23 @@ class ETLMonitor:
         :return: Dictionary with process details or None
         """
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+            # Reuse the process found on the previous tick while it is alive;
+            # is_running() also guards against the PID being reused
+            proc = self._etl_process
+            if proc is not None and proc.is_running():
+                try:
+                    return self._process_details(proc)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            self._etl_process = None
+
+            # Only fetch the command line of python processes
+            for proc in psutil.process_iter(['name']):
                 try:
-                    if ('python' in proc.info['name'] and 
-                        'run_streaming_etl.py' in ' '.join(proc.info.get('cmdline', []))):
-                        return {
-                            'pid': proc.info['pid'],
-                            'memory_percent': proc.memory_percent(),
-                            'cpu_percent': proc.cpu_percent(),
-                            'status': proc.status()
-                        }
+                    if ('python' in (proc.info['name'] or '') and
+                            any(ETL_SCRIPT in arg for arg in proc.cmdline())):
+                        self._etl_process = proc
+                        return self._process_details(proc)
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
             return None
@@ -65,6 +93,21 @@ class ETLMonitor:
             logging.error(traceback.format_exc())
             return None
 
+    @staticmethod
+    def _process_details(proc):
+        """
+        Collect resource usage of the ETL process.
+
+        :param proc: psutil.Process of the ETL
+        :return: Dictionary with process details
+        """
+        return {
+            'pid': proc.pid,
+            'memory_percent': proc.memory_percent(),
+            'cpu_percent': proc.cpu_percent(),
+            'status': proc.status()
+        }
+
     def get_disk_usage(self):
         """
         Get disk usage information for the base directory.
@@ -91,22 +134,31 @@ class ETLMonitor:
         :return: List of database statistics
         """
         try:
-            with psycopg2.connect(**self.db_config) as conn:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT 
-                            schemaname, 
-                            relname, 
-                            n_live_tup AS row_count,
-                            pg_size_pretty(pg_total_relation_size(schemaname || '.' || relname)) AS size,
-                            schemaname = 'openalex' AS is_openalex_schema
-                        FROM pg_stat_user_tables 
-                        ORDER BY n_live_tup DESC
-                    """)
-                    return cur.fetchall()
+            if self._db_conn is None or self._db_conn.closed:
+                options = ' '.join(filter(None, [self.db_config.get('options'), SESSION_OPTIONS]))
+                self._db_conn = psycopg2.connect(**{**self.db_config, 'options': options})
+                # Statistics snapshots are per transaction; autocommit makes
+                # every tick see fresh counts on the reused connection
+                self._db_conn.autocommit = True
+            with self._db_conn.cursor() as cur:
+                cur.execute("""
+                    SELECT 
+                        schemaname, 
+                        relname, 
+                        n_live_tup AS row_count,
+                        pg_size_pretty(pg_total_relation_size(schemaname || '.' || relname)) AS size,
+                        schemaname = 'openalex' AS is_openalex_schema
+                    FROM pg_stat_user_tables 
+                    ORDER BY n_live_tup DESC
+                """)
+                return cur.fetchall()
         except Exception as e:
             logging.error(f"Error getting database stats: {str(e)}")
             logging.error(traceback.format_exc())
+            # Reconnect on the next tick
+            if self._db_conn is not None:
+                self._db_conn.close()
+                self._db_conn = None
             return []
 
     def get_etl_state(self):
@@ -117,8 +169,14 @@ class ETLMonitor:
         """
         try:
             state_file = os.path.join(self.base_dir, 'data', 'state', 'ingestion_state.json')
-            with open(state_file, 'r') as f:
-                return json.load(f)
+            stat = os.stat(state_file)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            # Only re-parse when the ETL has written the file since last tick
+            if self._etl_state_stat != stat_key:
+                with open(state_file, 'rb') as f:
+                    self._etl_state = orjson.loads(f.read())
+                self._etl_state_stat = stat_key
+            return self._etl_state
         except Exception as e:
             logging.error(f"Error reading state file: {str(e)}")
             logging.error(traceback.format_exc())
@@ -136,22 +194,55 @@ class ETLMonitor:
         
         errors = []
         try:
-            # Find the most recent log file
-            log_files = [
-                os.path.join(log_dir, f) for f in os.listdir(log_dir)
-                if f.endswith('.log')
-            ]
-            
-            if not log_files:
-                return errors
-
-            latest_log = max(log_files, key=os.path.getctime)
-            
-            with open(latest_log, 'r') as f:
-                # Capture last 50 errors
-                for line in f.readlines()[-50:]:
-                    if 'ERROR' in line:
-                        errors.append(line.strip())
+            # List log files, including rotated ones (.log.1, ...); the
+            # directory's mtime only changes when logs are added, removed or
+            # rotated, so reuse the last listing until then
+            dir_mtime = os.stat(log_dir).st_mtime_ns
+            cached = self._latest_logs.get(log_dir)
+            if cached and cached[0] == dir_mtime:
+                paths = cached[1]
+            else:
+                with os.scandir(log_dir) as entries:
+                    paths = [
+                        entry.path for entry in entries
+                        if entry.name.endswith('.log') or '.log.' in entry.name
+                    ]
+                self._latest_logs[log_dir] = (dir_mtime, paths)
+
+            # Writes to a log leave the directory untouched, so order newest
+            # first on every check; mtime rather than ctime: rotation renames
+            # update ctime
+            mtimes = {}
+            for path in paths:
+                try:
+                    mtimes[path] = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    pass
+            log_files = sorted(mtimes, key=mtimes.get, reverse=True)
+
+            # Read only the end of the newest log, continuing into its
+            # rotated predecessors while it is shorter than the read budget
+            lines = []
+            budget = LOG_TAIL_BYTES
+            for index, log_file in enumerate(log_files):
+                if index and not log_file.startswith(f"{log_files[0]}."):
+                    continue
+                with open(log_file, 'rb') as f:
+                    size = f.seek(0, os.SEEK_END)
+                    f.seek(max(0, size - budget))
+                    tail = f.read().splitlines()
+                if size > budget and tail:
+                    # Drop the line cut off by the seek
+                    tail.pop(0)
+                lines[:0] = tail
+                budget -= size
+                if budget <= 0 or len(lines) >= 50:
+                    break
+
+            # Capture errors among the last 50 lines
+            for line in lines[-50:]:
+                if b'ERROR' in line:
+                    errors.append(line.decode('utf-8', errors='replace').strip())
         except Exception as e:
             logging.error(f"Error checking logs: {str(e)}")
             logging.error(traceback.format_exc())
@@ -162,48 +253,60 @@ class ETLMonitor:
         """
         Generate and print a comprehensive ETL monitoring report.
         """
-        print("\n=== OpenAlex ETL Monitoring Report ===")
-        print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        # The sources are independent and mostly I/O bound, so gather them
+        # concurrently; the report takes as long as the slowest one
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            proc_future = executor.submit(self.get_process_info)
+            disk_future = executor.submit(self.get_disk_usage)
+            db_future = executor.submit(self.get_database_stats)
+            state_future = executor.submit(self.get_etl_state)
+            errors_future = executor.submit(self.check_logs_for_errors)
+
+        # Collect the report and write it out in one call
+        lines = ["\n=== OpenAlex ETL Monitoring Report ==="]
+        lines.append(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         # Process Information
-        print("\n--- Process Information ---")
-        proc_info = self.get_process_info()
+        lines.append("\n--- Process Information ---")
+        proc_info = proc_future.result()
         if proc_info:
-            print(f"PID: {proc_info['pid']}")
-            print(f"Memory Usage: {proc_info['memory_percent']:.2f}%")
-            print(f"CPU Usage: {proc_info['cpu_percent']:.2f}%")
-            print(f"Status: {proc_info['status']}")
+            lines.append(f"PID: {proc_info['pid']}")
+            lines.append(f"Memory Usage: {proc_info['memory_percent']:.2f}%")
+            lines.append(f"CPU Usage: {proc_info['cpu_percent']:.2f}%")
+            lines.append(f"Status: {proc_info['status']}")
         else:
-            print("ETL Process not found!")
+            lines.append("ETL Process not found!")
 
         # Disk Usage
-        print("\n--- Disk Usage ---")
-        disk_info = self.get_disk_usage()
-        print(f"Total: {disk_info.get('total', 0):.2f} GB")
-        print(f"Used: {disk_info.get('used', 0):.2f} GB ({disk_info.get('percent', 0)}%)")
-        print(f"Free: {disk_info.get('free', 0):.2f} GB")
+        lines.append("\n--- Disk Usage ---")
+        disk_info = disk_future.result()
+        lines.append(f"Total: {disk_info.get('total', 0):.2f} GB")
+        lines.append(f"Used: {disk_info.get('used', 0):.2f} GB ({disk_info.get('percent', 0)}%)")
+        lines.append(f"Free: {disk_info.get('free', 0):.2f} GB")
 
         # Database Statistics
-        print("\n--- Database Statistics ---")
-        db_stats = self.get_database_stats()
+        lines.append("\n--- Database Statistics ---")
+        db_stats = db_future.result()
         for stats in db_stats:
-            print(f"{stats[1]}: {stats[2]} rows ({stats[3]})")
+            lines.append(f"{stats[1]}: {stats[2]} rows ({stats[3]})")
 
         # ETL State
-        print("\n--- ETL State ---")
-        state = self.get_etl_state()
+        lines.append("\n--- ETL State ---")
+        state = state_future.result()
         for entity_type, entity_state in state.get('entities', {}).items():
-            print(f"{entity_type.capitalize()}:")
-            print(f"  Status: {entity_state.get('status', 'N/A')}")
-            print(f"  Last Processed File: {entity_state.get('current_file', 'N/A')}")
-            print(f"  Completed Files: {len(entity_state.get('completed_files', []))}")
+            lines.append(f"{entity_type.capitalize()}:")
+            lines.append(f"  Status: {entity_state.get('status', 'N/A')}")
+            lines.append(f"  Last Processed File: {entity_state.get('current_file', 'N/A')}")
+            lines.append(f"  Completed Files: {len(entity_state.get('completed_files', []))}")
 
         # Recent Errors
-        errors = self.check_logs_for_errors()
+        errors = errors_future.result()
         if errors:
-            print("\n--- Recent Errors ---")
-            for error in errors:
-                print(error)
+            lines.append("\n--- Recent Errors ---")
+            lines.extend(errors)
+
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
 
 def main():
     """